@@ -0,0 +1,49 @@
+"""
+Achievement awarding driven by grading events.
+
+An achievement is earned once a user has at least ``points_required``
+points and ``challenges_required`` completed challenges. Grading only asks
+for the achievements whose thresholds the attempt just crossed, using the
+running counters in UserStats, so the cost does not grow with the user's
+history. Achievements created or edited later are awarded to everyone who
+already qualifies by ``award_existing``.
+"""
+from django.db.models import Q
+from .models import Achievement, UserAchievement, UserStats
+from . import caching
+
+
+def award_crossed(user_id, points, completed, points_delta, completed_delta):
+    """Award what moving from (points - delta, completed - delta) to (points, completed) unlocked"""
+    if points_delta <= 0 and completed_delta <= 0:
+        return []
+    crossed = Achievement.objects.filter(
+        Q(points_required__gt=points - points_delta, points_required__lte=points,
+          challenges_required__lte=completed)
+        | Q(challenges_required__gt=completed - completed_delta, challenges_required__lte=completed,
+            points_required__lte=points)
+    ).values_list('id', flat=True)
+    awarded = UserAchievement.objects.bulk_create(
+        [UserAchievement(user_id=user_id, achievement_id=achievement_id) for achievement_id in crossed],
+        ignore_conflicts=True
+    )
+    if awarded:
+        # bulk_create sends no post_save
+        caching.bump_user(user_id)
+    return awarded
+
+
+def award_existing(achievement, batch_size=1000):
+    """Award ``achievement`` to every user whose counters already meet it"""
+    qualifying = UserStats.objects.filter(
+        total_score__gte=achievement.points_required,
+        completed_challenges__gte=achievement.challenges_required
+    ).values_list('user_id', flat=True)
+
+    batch = []
+    for user_id in qualifying.iterator(chunk_size=batch_size):
+        batch.append(UserAchievement(user_id=user_id, achievement=achievement))
+        if len(batch) == batch_size:
+            UserAchievement.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    UserAchievement.objects.bulk_create(batch, ignore_conflicts=True)
@@ -19,6 +19,9 @@ class SubmissionAdmin(admin.ModelAdmin):
     list_filter = ('status', 'created_at')
     search_fields = ('user__username', 'challenge__title')
     date_hierarchy = 'created_at'
+    # Show the code itself rather than a select over every stored blob
+    exclude = ('code_blob', 'legacy_code')
+    readonly_fields = ('code',)
 
 @admin.register(Discussion)
 class DiscussionAdmin(admin.ModelAdmin):
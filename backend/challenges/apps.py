@@ -6,3 +6,5 @@ class ChallengesConfig(AppConfig):
 
     def ready(self):
         import challenges.signals  # noqa
+        from challenges.execution import pin_web_process
+        pin_web_process()
@@ -0,0 +1,112 @@
+"""
+Response caching for the read-heavy viewsets.
+
+Cached responses are keyed by the request path and query string, the
+current version of every namespace the response depends on and, for
+per-user responses, a version for that user. Invalidating is a version
+bump, which makes every older key unreachable: model signals bump the
+namespaces (see challenges.signals) and a user's own writes bump their
+user version. Versions are random tokens rather than counters, so a
+version key lost to cache culling comes back as a value no older key
+was built from. Entries also expire after RESPONSE_CACHE_SECONDS, which
+bounds how stale cross-user figures like submission counts can get.
+
+Hit and miss counters are kept in memory by each process, so serving a
+hit writes nothing to the cache.
+"""
+import hashlib
+import threading
+import uuid
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def _version_key(namespace):
+    return f'response-cache:version:{namespace}'
+
+
+def _user_namespace(user_id):
+    return f'user-{user_id}'
+
+
+def bump(namespace):
+    """Invalidate every cached response depending on ``namespace``"""
+    cache.set(_version_key(namespace), uuid.uuid4().hex, None)
+
+
+def _versions(namespaces):
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Never set or culled: start from a fresh version, keeping
+            # whichever one another process stored first
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_user(user_id):
+    """Invalidate the cached per-user responses of one user"""
+    bump(_user_namespace(user_id))
+
+
+def _count(namespace, outcome):
+    with _counts_lock:
+        _counts[namespace, outcome] += 1
+
+
+def stats(namespaces):
+    """Hit and miss counts for each namespace, served by this process since it started"""
+    with _counts_lock:
+        return {
+            namespace: {outcome: _counts[namespace, outcome] for outcome in ('hits', 'misses')}
+            for namespace in namespaces
+        }
+
+
+class CachedResponseMixin:
+    """
+    Serve ``list`` and ``retrieve`` from the cache. ``cache_namespaces``
+    names what the payload is built from, the first one also labels the
+    hit/miss counters; ``cache_per_user`` is for payloads that include the
+    requesting user's own status.
+    """
+    cache_namespaces = ()
+    cache_per_user = False
+
+    def _cache_key(self, request):
+        namespaces = list(self.cache_namespaces)
+        if self.cache_per_user:
+            namespaces.append(_user_namespace(request.user.pk))
+        parts = [f'{namespace}={version}' for namespace, version in zip(namespaces, _versions(namespaces))]
+        parts.append(request.get_full_path())
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return f'response-cache:{self.cache_namespaces[0]}:{digest}'
+
+    def _cached(self, request, render):
+        key = self._cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _count(self.cache_namespaces[0], 'hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(self.cache_namespaces[0], 'misses')
+        response = render()
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_SECONDS)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
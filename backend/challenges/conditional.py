@@ -0,0 +1,56 @@
+"""
+Conditional GET for list and retrieve.
+
+Views describe their current state with a few cheap aggregates (latest
+``updated_at``, row counts, latest submission id) instead of the payload.
+The ETag is a hash of that state, the request path and the user, so a
+matching ``If-None-Match`` gets a 304 before anything is serialized.
+``If-Modified-Since`` is not answered: a deletion lowers the counts in the
+state without moving the latest timestamp, so only the ETag notices it.
+Last-Modified is still sent for clients that display it.
+"""
+import hashlib
+from django.core.exceptions import ValidationError
+from django.utils.cache import quote_etag
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    def get_conditional_state(self):
+        """
+        Return (parts, last_modified): values that change whenever the
+        response would, and the datetime of the latest change (or None).
+        Return None when the requested object does not exist.
+        """
+        raise NotImplementedError
+
+    def _conditional(self, request, render):
+        try:
+            state = self.get_conditional_state()
+        except (ValueError, ValidationError):
+            # A malformed pk; the normal view answers with a 404
+            state = None
+        if state is None:
+            return render()
+        parts, last_modified = state
+        parts = [*parts, request.user.pk, request.get_full_path()]
+        etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        not_modified = etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+
+        response = Response(status=status.HTTP_304_NOT_MODIFIED) if not_modified else render()
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
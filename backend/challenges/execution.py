@@ -0,0 +1,440 @@
+import fcntl
+import json
+import math
+import os
+import resource
+import shutil
+import signal
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from . import sandbox
+
+# How each supported language is compiled and run. Sources are written to
+# ``source`` inside a per-program working directory.
+LANGUAGE_CONFIGS = {
+    'python': {
+        'source': 'solution.py',
+        'run_command': ['python', 'solution.py'],
+        'compile_required': False
+    },
+    'javascript': {
+        'source': 'solution.js',
+        'run_command': ['node', 'solution.js'],
+        'compile_required': False
+    },
+    'java': {
+        'source': 'Main.java',
+        'run_command': ['java', '-cp', '.', 'Main'],
+        'compile_command': ['javac', 'Main.java'],
+        'compile_required': True
+    },
+    'cpp': {
+        'source': 'solution.cpp',
+        'run_command': ['./solution'],
+        'compile_command': ['g++', '-O2', '-o', 'solution', 'solution.cpp'],
+        'compile_required': True
+    }
+}
+
+FUNCTION_HARNESS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'function_harness.py')
+
+DEFAULT_TIME_MULTIPLIERS = {
+    'python': 3.0,
+    'javascript': 2.0,
+    'java': 2.0,
+    'cpp': 1.0,
+}
+
+
+def get_time_limit(challenge, language):
+    """Per-test CPU limit in seconds for ``language`` on ``challenge``"""
+    multipliers = getattr(settings, 'EXECUTION_TIME_MULTIPLIERS', DEFAULT_TIME_MULTIPLIERS)
+    return challenge.cpu_time_limit * multipliers.get(language, 1.0)
+
+
+class ExecutionBusy(Exception):
+    """Raised when no execution slot frees up within EXECUTION_SLOT_WAIT"""
+
+
+class ExecutionSlot:
+    """
+    One of a fixed number of places a program may run. When EXECUTION_CORES
+    is configured each slot owns one core and everything started in it is
+    pinned there, so timings do not depend on what else the machine is doing.
+    """
+
+    def __init__(self, index, core):
+        self.index = index
+        self.core = core
+
+    def pin(self):
+        # Runs in the child between fork and exec
+        if self.core is not None:
+            os.sched_setaffinity(0, {self.core})
+
+
+def _slot_cores():
+    cores = getattr(settings, 'EXECUTION_CORES', [])
+    if cores:
+        return list(cores)
+    # No dedicated cores: one unpinned slot per CPU we are allowed to use
+    return [None] * len(os.sched_getaffinity(0))
+
+
+@contextmanager
+def execution_slot():
+    """
+    Hold an execution slot for the duration of the block.
+
+    Slots are claimed with flock() on one file per slot, so every web worker
+    process on the host shares the same pool.
+    """
+    slot_dir = getattr(settings, 'EXECUTION_SLOT_DIR', os.path.join(tempfile.gettempdir(), 'createathon-slots'))
+    os.makedirs(slot_dir, exist_ok=True)
+    cores = _slot_cores()
+    deadline = time.monotonic() + getattr(settings, 'EXECUTION_SLOT_WAIT', 30)
+
+    while True:
+        for index, core in enumerate(cores):
+            fd = os.open(os.path.join(slot_dir, f'slot-{index}.lock'), os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            try:
+                yield ExecutionSlot(index, core)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            return
+        if time.monotonic() > deadline:
+            raise ExecutionBusy("All execution slots are busy")
+        time.sleep(0.01)
+
+
+def pin_web_process():
+    """Keep this process (and the threads serving requests) on EXECUTION_RESERVED_CORES"""
+    reserved = getattr(settings, 'EXECUTION_RESERVED_CORES', [])
+    if reserved:
+        os.sched_setaffinity(0, set(reserved))
+
+
+def _limit_cpu(time_limit):
+    # Runs in the child between fork and exec. The kernel sends SIGXCPU at the
+    # soft limit and SIGKILL one second later if the program ignores it.
+    soft = max(1, math.ceil(time_limit))
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 1))
+
+
+class _Watchdog:
+    """Kills a process group that is still alive after ``timeout`` wall-clock seconds"""
+
+    def __init__(self, pgid, timeout):
+        self.pgid = pgid
+        self.fired = False
+        self._done = False
+        self._lock = threading.Lock()
+        self._timer = threading.Timer(timeout, self._kill)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _kill(self):
+        with self._lock:
+            if self._done:
+                return
+            self.fired = True
+            try:
+                os.killpg(self.pgid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def stop(self):
+        with self._lock:
+            self._done = True
+        self._timer.cancel()
+        return self.fired
+
+
+class Program:
+    """
+    A submission prepared for execution. The source is written and compiled
+    once, then ``run`` can be called for every test case. The program holds
+    an execution slot from ``__enter__`` until ``__exit__``.
+    """
+
+    def __init__(self, code, language):
+        # Default to Python if language not recognized
+        self.language = language if language in LANGUAGE_CONFIGS else 'python'
+        self.config = LANGUAGE_CONFIGS[self.language]
+        self.code = code
+        self.workdir = None
+        self.compile_error = None
+        self.slot = None
+        self.sandbox = None
+        self._slot_context = None
+
+    def __enter__(self):
+        self._slot_context = execution_slot()
+        self.slot = self._slot_context.__enter__()
+        try:
+            if sandbox.is_enabled():
+                self.sandbox = sandbox.Sandbox(self.slot)
+            self.prepare()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+        if self._slot_context is not None:
+            self._slot_context.__exit__(exc_type, exc_value, traceback)
+            self._slot_context = None
+            self.slot = None
+            self.sandbox = None
+
+    def _pin(self):
+        if self.slot is not None:
+            self.slot.pin()
+
+    def prepare(self):
+        self.workdir = tempfile.mkdtemp(prefix='createathon-')
+        with open(os.path.join(self.workdir, self.config['source']), 'w') as f:
+            f.write(self.code)
+        self._grant_workdir()
+
+        if not self.config.get('compile_required', False):
+            return
+
+        timeout = getattr(settings, 'EXECUTION_COMPILE_TIMEOUT', 30)
+        try:
+            # The compiler reads what the submission names (#include, import)
+            # and echoes it in its errors, so it is sandboxed like the program
+            compile_process = subprocess.run(
+                self.config['compile_command'],
+                cwd=self.workdir,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                env=self.sandbox.environment(self.workdir) if self.sandbox else None,
+                preexec_fn=lambda: self._preexec(timeout)
+            )
+        except subprocess.TimeoutExpired:
+            message = f"Compilation timed out after {timeout} seconds"
+            self.compile_error = {
+                "stdout": "",
+                "stderr": message,
+                "error": "Compilation Error: " + message,
+                "status": "Compilation Error"
+            }
+            return
+
+        if compile_process.returncode != 0:
+            self.compile_error = {
+                "stdout": "",
+                "stderr": compile_process.stderr,
+                "error": "Compilation Error: " + compile_process.stderr,
+                "status": "Compilation Error"
+            }
+
+    def _grant_workdir(self):
+        if self.sandbox is not None:
+            self.sandbox.grant(self.workdir)
+
+    def cleanup(self):
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
+
+    def _preexec(self, time_limit):
+        self._pin()
+        _limit_cpu(time_limit)
+        if self.sandbox is not None:
+            self.sandbox.enter()
+
+    def run(self, input_data, time_limit, command=None):
+        """
+        Run the program once with ``input_data`` on stdin. ``command``
+        replaces the language's run command, e.g. to start a judge harness.
+
+        ``time_limit`` is the CPU budget in seconds. Going over it gives a
+        "Time Limit Exceeded" verdict. A program that stays below it but does
+        not finish within the wall-clock allowance (sleeping, blocked on I/O)
+        gives "Timeout" instead.
+        """
+        if self.compile_error:
+            return dict(self.compile_error, cpu_time=None, wall_time=None)
+
+        wall_factor = getattr(settings, 'EXECUTION_WALL_TIME_FACTOR', 2.0)
+        wall_limit = max(time_limit * wall_factor, time_limit + 1)
+
+        # Files instead of pipes: nothing has to pump the streams while we
+        # block in wait4() for the child's resource usage.
+        with tempfile.TemporaryFile() as stdin, \
+                tempfile.TemporaryFile() as stdout, \
+                tempfile.TemporaryFile() as stderr:
+            stdin.write((input_data or '').encode())
+            stdin.seek(0)
+            oom_kills = self.sandbox.oom_kills() if self.sandbox else 0
+
+            started = time.monotonic()
+            process = subprocess.Popen(
+                command or self.config['run_command'],
+                cwd=self.workdir,
+                stdin=stdin,
+                stdout=stdout,
+                stderr=stderr,
+                start_new_session=True,
+                env=self.sandbox.environment(self.workdir) if self.sandbox else None,
+                preexec_fn=lambda: self._preexec(time_limit)
+            )
+            watchdog = _Watchdog(process.pid, wall_limit)
+            # Wait without reaping so the watchdog can never signal a reused pid
+            os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+            stalled = watchdog.stop()
+            _, wait_status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(wait_status)
+            wall_time = time.monotonic() - started
+            cpu_time = usage.ru_utime + usage.ru_stime
+            out_of_memory = self.sandbox is not None and self.sandbox.oom_kills() > oom_kills
+
+            stdout.seek(0)
+            stderr.seek(0)
+            output = stdout.read().decode(errors='replace')
+            errors = stderr.read().decode(errors='replace')
+
+        result = {
+            "stdout": output,
+            "stderr": errors,
+            "error": None,
+            "status": "Success",
+            "cpu_time": cpu_time,
+            "wall_time": wall_time
+        }
+
+        if stalled:
+            message = f"Execution stalled: no result after {wall_limit:.1f} seconds of wall-clock time"
+            result.update(stderr=errors or message, error=message, status="Timeout")
+        elif out_of_memory:
+            message = f"Memory limit exceeded ({getattr(settings, 'EXECUTION_MEMORY_LIMIT', '256M')})"
+            result.update(stderr=errors or message, error=message, status="Memory Limit Exceeded")
+        elif cpu_time > time_limit or process.returncode == -signal.SIGXCPU:
+            message = f"Time limit exceeded: used {cpu_time:.2f}s of {time_limit:.2f}s CPU time"
+            result.update(stderr=errors or message, error=message, status="Time Limit Exceeded")
+        elif process.returncode != 0:
+            message = errors or f"Error: Program exited with code {process.returncode}"
+            result.update(stderr=message, error=message, status="Error")
+
+        return result
+
+
+def benchmark(program, inputs, time_limit, runs):
+    """
+    Run ``program`` ``runs`` times over every input in ``inputs`` and return
+    the median and 95th percentile of the CPU time each pass took. Returns
+    None if any run fails, since a result that only sometimes succeeds
+    should not be ranked.
+    """
+    timings = []
+    for _ in range(runs):
+        total = 0.0
+        for input_data in inputs:
+            result = program.run(input_data, time_limit)
+            if result['status'] != 'Success':
+                return None
+            total += result['cpu_time']
+        timings.append(total)
+
+    timings.sort()
+    return {
+        'median': statistics.median(timings),
+        'p95': timings[math.ceil(0.95 * len(timings)) - 1],
+        'runs': timings
+    }
+
+
+def values_equal(actual, expected):
+    """Deep comparison of JSON values; floats only need to agree to 1e-9"""
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return type(actual) is type(expected) and actual == expected
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9)
+    if isinstance(expected, list) and isinstance(actual, list):
+        return len(actual) == len(expected) and all(
+            values_equal(a, e) for a, e in zip(actual, expected)
+        )
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return actual.keys() == expected.keys() and all(
+            values_equal(actual[key], expected[key]) for key in expected
+        )
+    return actual == expected
+
+
+def _valid_results(results, expected_count):
+    return isinstance(results, list) and len(results) == expected_count and all(
+        isinstance(case_result, dict)
+        and case_result.get('status') in ('Success', 'Error', 'Time Limit Exceeded')
+        and (case_result['status'] != 'Success' or 'value' in case_result)
+        for case_result in results
+    )
+
+
+def run_function_cases(program, function_name, cases, time_limit):
+    """
+    Import a Python ``program`` once in a harness process and call
+    ``function_name`` for every case. ``time_limit`` applies to each call.
+
+    Returns one dict per case with ``status``, ``value`` (the JSON-decoded
+    return value), ``error`` and ``cpu_time``. Expected values never reach
+    the harness; callers compare them with ``values_equal``.
+    """
+    shutil.copy(FUNCTION_HARNESS, os.path.join(program.workdir, '_harness.py'))
+    calls = [{'args': case.get('args', []), 'kwargs': case.get('kwargs', {})} for case in cases]
+    command = ['python', '_harness.py', program.config['source'], function_name, str(time_limit)]
+    # The harness process pays for importing the solution once plus every call
+    result = program.run(json.dumps(calls), time_limit * max(1, len(cases)) + 1, command=command)
+
+    try:
+        report = json.loads(result['stdout'])
+    except ValueError:
+        report = {'error': result['error'] or result['stderr'] or 'Judge harness produced no result'}
+    if not isinstance(report, dict):
+        report = {'error': 'Judge harness produced an invalid result'}
+
+    # The solution runs inside the harness process and can reach its output,
+    # so only a report with one well-formed result per case is believed
+    if 'results' in report and not _valid_results(report['results'], len(cases)):
+        report = {'error': 'Judge harness result does not match the test cases'}
+
+    if 'results' not in report:
+        status = result['status'] if result['status'] != 'Success' else 'Error'
+        return [
+            {'status': status, 'value': None, 'error': report['error'], 'cpu_time': None}
+            for _ in cases
+        ]
+    return [dict({'value': None, 'error': None}, **case_result) for case_result in report['results']]
+
+
+def execute_code(code, language, input_data, time_limit):
+    """Compile and run ``code`` once against ``input_data``"""
+    try:
+        with Program(code, language) as program:
+            return program.run(input_data, time_limit)
+    except ExecutionBusy:
+        raise
+    except Exception as e:
+        error_msg = str(e)
+        return {
+            "stdout": "",
+            "stderr": error_msg,
+            "error": error_msg,
+            "status": "Error",
+            "cpu_time": None,
+            "wall_time": None
+        }
@@ -0,0 +1,56 @@
+"""
+Sparse fieldsets for GET requests.
+
+``?fields=id,title`` limits a response to the named fields and
+``?expand=progress`` adds fields a serializer lists in
+``Meta.expandable_fields``, which are otherwise left out. Only the
+top-level serializer of a response is affected. Fields that are dropped
+are removed before serialization, so their SerializerMethodFields never
+run; views use ``wants_field``/``wants_expanded`` to leave out the
+annotations and joins those fields would need.
+"""
+from rest_framework import serializers
+
+
+def _requested(request, param):
+    if request is None or request.method != 'GET':
+        return None
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def wants_field(request, name):
+    fields = _requested(request, 'fields')
+    return fields is None or name in fields
+
+
+def wants_expanded(request, name):
+    return name in (_requested(request, 'expand') or ())
+
+
+class SparseFieldsetMixin:
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_top_level():
+            return fields
+
+        request = self.context.get('request')
+        expand = _requested(request, 'expand') or set()
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if name not in expand:
+                fields.pop(name, None)
+
+        requested = _requested(request, 'fields')
+        if requested is not None:
+            for name in list(fields):
+                if name not in requested and name not in expand:
+                    del fields[name]
+        return fields
+
+    def _is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
@@ -0,0 +1,74 @@
+"""
+Judge harness for function-mode Python challenges.
+
+Run as ``python _harness.py solution.py <function_name> <time_limit>`` with a
+JSON list of ``{"args": [...], "kwargs": {...}}`` objects on stdin. The
+solution is imported once and the function is called for every case. One
+JSON result per case is written to the original stdout; anything the
+solution prints goes to stderr. This file is copied into the program's
+working directory and must not import Django or anything from the project.
+"""
+import importlib.util
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+
+
+class TimeLimitExceeded(BaseException):
+    pass
+
+
+def _on_timer(signum, frame):
+    raise TimeLimitExceeded()
+
+
+def main():
+    path, function_name, time_limit = sys.argv[1], sys.argv[2], float(sys.argv[3])
+    cases = json.load(sys.stdin)
+
+    # Keep a private handle on stdout for the results and send fd 1 to
+    # stderr, so prints from the solution (even C-level ones) can't mix in.
+    results_out = os.fdopen(os.dup(1), 'w')
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    try:
+        spec = importlib.util.spec_from_file_location('solution', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        function = getattr(module, function_name)
+    except BaseException:
+        json.dump({'error': traceback.format_exc(limit=-3)}, results_out)
+        results_out.flush()
+        return
+
+    signal.signal(signal.SIGPROF, _on_timer)
+    results = []
+    for case in cases:
+        started = time.process_time()
+        signal.setitimer(signal.ITIMER_PROF, time_limit)
+        try:
+            value = function(*case.get('args', []), **case.get('kwargs', {}))
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        except TimeLimitExceeded:
+            result = {'status': 'Time Limit Exceeded', 'error': f'Time limit exceeded ({time_limit:.2f}s CPU)'}
+        except BaseException:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            result = {'status': 'Error', 'error': traceback.format_exc(limit=-3)}
+        else:
+            try:
+                result = {'status': 'Success', 'value': json.loads(json.dumps(value))}
+            except (TypeError, ValueError):
+                result = {'status': 'Error', 'error': f'Return value of type {type(value).__name__} is not JSON serializable'}
+        result['cpu_time'] = time.process_time() - started
+        results.append(result)
+
+    json.dump({'results': results}, results_out)
+    results_out.flush()
+
+
+if __name__ == '__main__':
+    main()
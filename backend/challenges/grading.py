@@ -0,0 +1,92 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import UserProgress
+from .signals import submission_graded
+
+
+def _first_attempt(user, challenge, passed, score, best_time):
+    """Insert the progress row for a first attempt, or return None if another request beat us to it"""
+    fields = {'status': 'in_progress', 'attempts': 1}
+    if passed:
+        fields.update(
+            status='completed',
+            completed_at=timezone.now(),
+            current_score=score,
+            best_score=score,
+            best_time=best_time
+        )
+    try:
+        with transaction.atomic():
+            return UserProgress.objects.create(user=user, challenge=challenge, **fields)
+    except IntegrityError:
+        # Only a row that now exists means we lost the race; anything else
+        # (the user or challenge deleted meanwhile) would fail on every retry
+        if not UserProgress.objects.filter(user=user, challenge=challenge).exists():
+            raise
+        return None
+
+
+def _next_attempt(progress, passed, score, best_time):
+    """
+    Apply an attempt to ``progress`` as it was just read. The UPDATE only
+    matches while ``attempts`` still holds the value we read, so a concurrent
+    attempt makes it miss (and return False) instead of being overwritten.
+    """
+    seen = progress.attempts
+    changes = {'attempts': F('attempts') + 1}
+    progress.attempts += 1
+    if passed:
+        progress.status = 'completed'
+        progress.completed_at = timezone.now()
+        progress.current_score = score
+        progress.best_score = max(progress.best_score, score)
+        if best_time is not None and (progress.best_time is None or best_time < progress.best_time):
+            progress.best_time = best_time
+        changes.update(
+            status=progress.status,
+            completed_at=progress.completed_at,
+            current_score=progress.current_score,
+            best_score=progress.best_score,
+            best_time=progress.best_time
+        )
+    return UserProgress.objects.filter(pk=progress.pk, attempts=seen).update(**changes) == 1
+
+
+def record_attempt(user, challenge, passed, score, best_time=None):
+    """
+    Apply one graded submission to the user's progress on ``challenge``.
+
+    ``score`` is what the submission earned if it passed and ``best_time``
+    its benchmark median on performance-scored challenges. The row is
+    written with a single INSERT or compare-and-set UPDATE, retried if a
+    concurrent submission got there first, so no attempt is lost and
+    ``post_save`` is not sent. Sends ``submission_graded`` with the
+    resulting change in the user's points, which count the best score of
+    every completed challenge.
+    """
+    while True:
+        progress = UserProgress.objects.filter(user=user, challenge=challenge).first()
+        if progress is None:
+            progress = _first_attempt(user, challenge, passed, score, best_time)
+            if progress is not None:
+                created, was_completed, previous_points = True, False, 0
+                break
+            continue
+
+        progress.user, progress.challenge = user, challenge
+        was_completed = progress.status == 'completed'
+        previous_points = progress.best_score if was_completed else 0
+        if _next_attempt(progress, passed, score, best_time):
+            created = False
+            break
+
+    points = progress.best_score if progress.status == 'completed' else 0
+    submission_graded.send(
+        sender=UserProgress,
+        progress=progress,
+        points_delta=points - previous_points,
+        first_attempt=created,
+        newly_completed=passed and not was_completed
+    )
+    return progress
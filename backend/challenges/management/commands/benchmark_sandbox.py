@@ -0,0 +1,51 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from challenges.execution import Program
+
+TRIVIAL_PROGRAMS = {
+    'python': 'pass',
+    'javascript': '',
+    'java': 'public class Main { public static void main(String[] args) {} }',
+    'cpp': 'int main() { return 0; }',
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure how much wall-clock time the execution sandbox adds to each run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200)
+        parser.add_argument('--language', choices=sorted(TRIVIAL_PROGRAMS), default='cpp')
+
+    def measure(self, language, runs, sandboxed):
+        timings = []
+        with override_settings(EXECUTION_SANDBOX=sandboxed):
+            with Program(TRIVIAL_PROGRAMS[language], language) as program:
+                if program.compile_error:
+                    raise RuntimeError(program.compile_error['error'])
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    result = program.run('', 5)
+                    timings.append(time.perf_counter() - started)
+                    if result['status'] != 'Success':
+                        raise RuntimeError(result['error'])
+        timings.sort()
+        return statistics.median(timings), timings[int(0.95 * (len(timings) - 1))]
+
+    def handle(self, *args, **options):
+        language, runs = options['language'], options['runs']
+        # One warm-up run each so one-time setup (cgroup creation) is not counted
+        self.measure(language, 1, False)
+        self.measure(language, 1, True)
+
+        plain_median, plain_p95 = self.measure(language, runs, False)
+        boxed_median, boxed_p95 = self.measure(language, runs, True)
+
+        self.stdout.write(f'{runs} runs of an empty {language} program')
+        self.stdout.write(f'  unsandboxed  median {plain_median * 1000:7.2f} ms   p95 {plain_p95 * 1000:7.2f} ms')
+        self.stdout.write(f'  sandboxed    median {boxed_median * 1000:7.2f} ms   p95 {boxed_p95 * 1000:7.2f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Sandbox overhead: {(boxed_median - plain_median) * 1000:.2f} ms per run (median)'
+        ))
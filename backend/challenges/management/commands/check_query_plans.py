@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from challenges.query_plans import hot_queries, plan_indexes
+
+
+class Command(BaseCommand):
+    help = 'Check with EXPLAIN that every hot query path is served by its index'
+
+    def handle(self, *args, **options):
+        failures = []
+        for description, queryset, index in hot_queries():
+            try:
+                used = plan_indexes(queryset)
+            except NotImplementedError as e:
+                raise CommandError(str(e))
+            if index in used:
+                self.stdout.write(f'  ok    {description} ({index})')
+            else:
+                self.stdout.write(f'  FAIL  {description}: expected {index}, plan uses: {used or "no index"}')
+                failures.append(description)
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries are not using their index')
+        self.stdout.write(self.style.SUCCESS('All hot queries use their indexes'))
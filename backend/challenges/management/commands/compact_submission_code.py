@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+from challenges.models import CodeBlob, Submission
+
+
+class Command(BaseCommand):
+    help = (
+        'Move submission code into deduplicated, compressed blobs, delete blobs no submission '
+        'uses any more and report the storage saved'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--report-only', action='store_true', help='Only print the storage report')
+
+    def handle(self, *args, **options):
+        if not options['report_only']:
+            self.backfill(options['batch_size'])
+            self.sweep(options['batch_size'])
+        self.report()
+
+    def backfill(self, batch_size):
+        pending = Submission.objects.filter(code_blob__isnull=True).order_by('id')
+        last_id, moved = 0, 0
+        while True:
+            batch = list(pending.filter(id__gt=last_id).values_list('id', 'legacy_code')[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                blobs = {}
+                for submission_id, code in batch:
+                    if code not in blobs:
+                        blobs[code] = CodeBlob.store(code)
+                    Submission.objects.filter(id=submission_id).update(code_blob=blobs[code], legacy_code='')
+            last_id = batch[-1][0]
+            moved += len(batch)
+            self.stdout.write(f'  {moved} submissions moved')
+
+    def sweep(self, batch_size):
+        # Blobs are kept (PROTECT) while any submission points at them, so
+        # deleting submissions leaves their code behind until this runs
+        orphans = CodeBlob.objects.filter(submissions__isnull=True).order_by('sha256')
+        last_key, deleted = '', 0
+        while True:
+            batch = list(orphans.filter(sha256__gt=last_key).values_list('sha256', flat=True)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                # Filter again: a new submission may have reused one meanwhile
+                deleted += orphans.filter(sha256__in=batch).delete()[0]
+            last_key = batch[-1]
+            self.stdout.write(f'  {deleted} unused blobs deleted')
+
+    def report(self):
+        submissions = Submission.objects.filter(code_blob__isnull=False).aggregate(
+            count=Count('id'),
+            original=Sum('code_blob__size')
+        )
+        blobs = CodeBlob.objects.aggregate(count=Count('sha256'), size=Sum('size'), stored=Sum(Length('data')))
+        orphans = CodeBlob.objects.filter(submissions__isnull=True).aggregate(
+            count=Count('sha256'),
+            stored=Sum(Length('data'))
+        )
+        legacy = Submission.objects.filter(code_blob__isnull=True).count()
+
+        original = submissions['original'] or 0
+        stored = blobs['stored'] or 0
+        self.stdout.write(f"Submissions in blobs:   {submissions['count']} ({legacy} not yet moved)")
+        self.stdout.write(f"Distinct blobs:         {blobs['count']}")
+        self.stdout.write(f'Code as submitted:      {original} bytes')
+        self.stdout.write(f"After deduplication:    {blobs['size'] or 0} bytes")
+        self.stdout.write(f'Stored (compressed):    {stored} bytes')
+        self.stdout.write(f"Unused blobs:           {orphans['count']} ({orphans['stored'] or 0} bytes)")
+        if original:
+            self.stdout.write(self.style.SUCCESS(
+                f'Saved {original - stored} bytes ({100 * (original - stored) / original:.1f}%)'
+            ))
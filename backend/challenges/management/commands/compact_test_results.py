@@ -0,0 +1,44 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from challenges import results
+from challenges.models import Submission
+
+
+class Command(BaseCommand):
+    help = 'Rewrite submission test results in the compact format and report the storage saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        submissions = Submission.objects.only('id', 'test_results').order_by('id')
+        last_id, checked, moved, before, after = 0, 0, 0, 0, 0
+        while True:
+            batch = list(submissions.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                for submission in batch:
+                    if not submission.test_results or results.is_compact(submission.test_results):
+                        continue
+                    compact = results.encode(submission.test_results)
+                    old_size = len(json.dumps(submission.test_results))
+                    new_size = len(json.dumps(compact))
+                    # Leave rows the compact form would not shrink
+                    if new_size >= old_size:
+                        continue
+                    before += old_size
+                    after += new_size
+                    Submission.objects.filter(id=submission.id).update(test_results=compact)
+                    moved += 1
+            last_id = batch[-1].id
+            checked += len(batch)
+            self.stdout.write(f'  {checked} checked, {moved} rewritten')
+
+        self.stdout.write(f'Rewritten submissions:  {moved}')
+        self.stdout.write(f'Test results before:    {before} bytes')
+        self.stdout.write(f'Test results after:     {after} bytes')
+        if after:
+            self.stdout.write(self.style.SUCCESS(f'{before / after:.1f}x smaller'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from challenges import achievements, stats
+from challenges.models import Achievement, UserStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user and per-category stats rows from user progress and award achievements they meet'
+
+    def handle(self, *args, **options):
+        stats.rebuild()
+        for achievement in Achievement.objects.all():
+            achievements.award_existing(achievement)
+        self.stdout.write(self.style.SUCCESS(
+            f'Stats rebuilt for {UserStats.objects.count()} users'
+        ))
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("challenges", "0011_remove_userprogress_draft_code"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="challenge",
+            name="cpu_time_limit",
+            field=models.FloatField(
+                default=1.0,
+                help_text="CPU time limit per test case in seconds, scaled per language",
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("challenges", "0012_challenge_cpu_time_limit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="challenge",
+            name="benchmark_runs",
+            field=models.IntegerField(
+                default=5,
+                help_text="Number of timed passes over the benchmark inputs for performance scoring",
+            ),
+        ),
+        migrations.AddField(
+            model_name="challenge",
+            name="reference_time",
+            field=models.FloatField(
+                blank=True,
+                help_text="Median CPU seconds the reference solution needs for one benchmark pass",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="challenge",
+            name="scoring",
+            field=models.CharField(
+                choices=[
+                    ("correctness", "Correctness"),
+                    ("performance", "Performance"),
+                ],
+                default="correctness",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="benchmark_median",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="benchmark_p95",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="userprogress",
+            name="best_time",
+            field=models.FloatField(
+                blank=True,
+                help_text="Fastest benchmark median on performance-scored challenges",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprogress",
+            index=models.Index(
+                fields=["challenge", "best_time"], name="progress_speed_ranking_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("challenges", "0013_performance_scoring"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="challenge",
+            name="function_name",
+            field=models.CharField(
+                blank=True,
+                help_text="Function called in function test mode",
+                max_length=100,
+            ),
+        ),
+        migrations.AddField(
+            model_name="challenge",
+            name="test_mode",
+            field=models.CharField(
+                choices=[
+                    ("stdio", "Standard input/output"),
+                    ("function", "Function call (Python)"),
+                ],
+                default="stdio",
+                help_text='Function mode test cases look like {"args": [...], "kwargs": {...}, "expected": ...}',
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("challenges", "0014_challenge_function_test_mode"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(
+                fields=["user", "-created_at"], name="submission_history_idx"
+            ),
+        ),
+    ]
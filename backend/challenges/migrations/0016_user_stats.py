@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0005_daily_score"),
+        ("challenges", "0015_submission_history_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("attempted_challenges", models.IntegerField(default=0)),
+                ("completed_challenges", models.IntegerField(default=0)),
+                ("total_attempts", models.IntegerField(default=0)),
+                (
+                    "total_points",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Challenge points of every completed challenge",
+                    ),
+                ),
+                (
+                    "total_score",
+                    models.IntegerField(
+                        default=0, help_text="Best scores of every completed challenge"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="UserCategoryStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("attempted_challenges", models.IntegerField(default=0)),
+                ("completed_challenges", models.IntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="user_stats",
+                        to="challenges.category",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="category_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "category")},
+            },
+        ),
+    ]
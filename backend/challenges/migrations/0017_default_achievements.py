@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:20
+
+from django.db import migrations
+
+# The badges UserViewSet.achievements used to compute on every request
+DEFAULT_ACHIEVEMENTS = [
+    ("First Steps", "Completed your first challenge", 0, 1),
+    ("Getting Started", "Completed 5 challenges", 0, 5),
+    ("Rising Star", "Completed 10 challenges", 0, 10),
+    ("Point Collector", "Earned 100 points", 100, 0),
+    ("Point Master", "Earned 500 points", 500, 0),
+]
+
+
+def create_achievements(apps, schema_editor):
+    Achievement = apps.get_model("challenges", "Achievement")
+    for name, description, points_required, challenges_required in DEFAULT_ACHIEVEMENTS:
+        Achievement.objects.get_or_create(
+            name=name,
+            defaults={
+                "description": description,
+                "points_required": points_required,
+                "challenges_required": challenges_required,
+            },
+        )
+
+
+def remove_achievements(apps, schema_editor):
+    Achievement = apps.get_model("challenges", "Achievement")
+    Achievement.objects.filter(name__in=[row[0] for row in DEFAULT_ACHIEVEMENTS]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("challenges", "0016_user_stats"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_achievements, remove_achievements),
+    ]
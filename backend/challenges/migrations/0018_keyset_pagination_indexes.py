@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("challenges", "0017_default_achievements"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="submission",
+            name="submission_history_idx",
+        ),
+        migrations.AddIndex(
+            model_name="discussion",
+            index=models.Index(
+                fields=["challenge", "-created_at", "-id"], name="discussion_thread_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="submission_history_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprogress",
+            index=models.Index(
+                fields=["user", "-started_at", "-id"], name="progress_history_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("challenges", "0018_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="challenge",
+            index=models.Index(
+                fields=["category", "difficulty", "-created_at"],
+                name="challenge_listing_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(
+                fields=["user", "challenge", "-created_at", "-id"],
+                name="submission_user_challenge_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(
+                fields=["user", "status"], name="submission_user_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprogress",
+            index=models.Index(
+                fields=["user", "status", "completed_at"],
+                name="progress_completion_idx",
+            ),
+        ),
+    ]
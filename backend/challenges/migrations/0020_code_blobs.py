@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("challenges", "0019_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CodeBlob",
+            fields=[
+                (
+                    "sha256",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("data", models.BinaryField()),
+                (
+                    "size",
+                    models.IntegerField(
+                        help_text="Length of the uncompressed code in bytes"
+                    ),
+                ),
+            ],
+        ),
+        # The existing code column is kept as legacy_code until
+        # compact_submission_code moves its contents into blobs
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name="submission",
+                    name="code",
+                ),
+                migrations.AddField(
+                    model_name="submission",
+                    name="legacy_code",
+                    field=models.TextField(blank=True, db_column="code", default=""),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="code_blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="submissions",
+                to="challenges.codeblob",
+            ),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import hashlib
+import zlib
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -23,6 +25,16 @@ class Challenge(models.Model):
         ('hard', 'Hard'),
     ]
 
+    TEST_MODE_CHOICES = [
+        ('stdio', 'Standard input/output'),
+        ('function', 'Function call (Python)'),
+    ]
+
+    SCORING_CHOICES = [
+        ('correctness', 'Correctness'),
+        ('performance', 'Performance'),
+    ]
+
     title = models.CharField(max_length=200)
     description = models.TextField()
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='challenges')
@@ -31,14 +43,63 @@ class Challenge(models.Model):
     content = models.TextField(help_text="Challenge content in Markdown format")
     template = models.TextField(blank=True, help_text="Initial code template for the challenge")
     test_cases = models.JSONField(default=list, help_text="List of test cases for programming challenges")
+    test_mode = models.CharField(
+        max_length=20, choices=TEST_MODE_CHOICES, default='stdio',
+        help_text="Function mode test cases look like {\"args\": [...], \"kwargs\": {...}, \"expected\": ...}"
+    )
+    function_name = models.CharField(max_length=100, blank=True, help_text="Function called in function test mode")
     time_limit = models.IntegerField(default=3600, help_text="Time limit in seconds")
+    cpu_time_limit = models.FloatField(default=1.0, help_text="CPU time limit per test case in seconds, scaled per language")
+    scoring = models.CharField(max_length=20, choices=SCORING_CHOICES, default='correctness')
+    benchmark_runs = models.IntegerField(default=5, help_text="Number of timed passes over the benchmark inputs for performance scoring")
+    reference_time = models.FloatField(null=True, blank=True, help_text="Median CPU seconds the reference solution needs for one benchmark pass")
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_challenges', null=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Challenge list filtered by category and difficulty, newest first
+            models.Index(fields=['category', 'difficulty', '-created_at'], name='challenge_listing_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    @property
+    def benchmark_inputs(self):
+        """Inputs of test cases flagged ``"benchmark": true``, or of all test cases if none are"""
+        flagged = [case for case in self.test_cases if case.get('benchmark')]
+        return [str(case.get('input', '')).strip() for case in (flagged or self.test_cases)]
+
+    def performance_score(self, median):
+        """Points for a benchmark median: full marks at or below reference_time, scaled down above it"""
+        if not self.reference_time or median <= 0:
+            return self.points
+        return round(self.points * min(1.0, self.reference_time / median))
+
+class CodeBlob(models.Model):
+    """
+    Submitted source code, stored once per distinct content and compressed.
+    Resubmissions of the same code share one row.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    size = models.IntegerField(help_text="Length of the uncompressed code in bytes")
+
+    @classmethod
+    def store(cls, code):
+        raw = code.encode()
+        blob, _ = cls.objects.get_or_create(
+            sha256=hashlib.sha256(raw).hexdigest(),
+            defaults={'data': zlib.compress(raw), 'size': len(raw)}
+        )
+        return blob
+
+    @property
+    def text(self):
+        return zlib.decompress(bytes(self.data)).decode()
+
 class Submission(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -49,16 +110,51 @@ class Submission(models.Model):
 
     challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='submissions')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submissions')
-    code = models.TextField()
+    code_blob = models.ForeignKey(CodeBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='submissions')
+    # Code of rows not yet moved to a blob by compact_submission_code
+    legacy_code = models.TextField(db_column='code', blank=True, default='')
     language = models.CharField(max_length=50)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     feedback = models.TextField(blank=True)
     test_results = models.JSONField(default=list, help_text="Results of test case executions")
     execution_time = models.FloatField(null=True, blank=True)
+    benchmark_median = models.FloatField(null=True, blank=True)
+    benchmark_p95 = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='submission_history_idx'),
+            # A user's latest submission per challenge (user_status) and the
+            # per-challenge submissions action
+            models.Index(fields=['user', 'challenge', '-created_at', '-id'], name='submission_user_challenge_idx'),
+            models.Index(fields=['user', 'status'], name='submission_user_status_idx'),
+        ]
+
+    # Code assigned since the last save, stored as a blob when saved
+    _pending_code = None
+
+    @property
+    def code(self):
+        if self._pending_code is not None:
+            return self._pending_code
+        if self.code_blob_id:
+            return self.code_blob.text
+        return self.legacy_code
+
+    @code.setter
+    def code(self, value):
+        self._pending_code = value
+
+    def save(self, *args, **kwargs):
+        if self._pending_code is not None:
+            self.code_blob = CodeBlob.store(self._pending_code)
+            self.legacy_code = ''
+            self._pending_code = None
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'code_blob', 'legacy_code'}
+        super().save(*args, **kwargs)
 
 class Discussion(models.Model):
     challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='discussions')
@@ -69,6 +165,9 @@ class Discussion(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['challenge', '-created_at', '-id'], name='discussion_thread_idx'),
+        ]
 
 class Achievement(models.Model):
     name = models.CharField(max_length=100)
@@ -103,7 +202,40 @@ class UserProgress(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     current_score = models.IntegerField(default=0)
     best_score = models.IntegerField(default=0)
+    best_time = models.FloatField(null=True, blank=True, help_text="Fastest benchmark median on performance-scored challenges")
     attempts = models.IntegerField(default=0)
 
     class Meta:
         unique_together = ['user', 'challenge']
+        indexes = [
+            models.Index(fields=['challenge', 'best_time'], name='progress_speed_ranking_idx'),
+            models.Index(fields=['user', '-started_at', '-id'], name='progress_history_idx'),
+            # Completed challenges per user, optionally within a time window
+            models.Index(fields=['user', 'status', 'completed_at'], name='progress_completion_idx'),
+        ]
+
+class UserStats(models.Model):
+    """
+    Running totals of a user's progress, kept current by the grading path
+    (see challenges.stats) so the stats endpoints read a single row.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attempted_challenges = models.IntegerField(default=0)
+    completed_challenges = models.IntegerField(default=0)
+    total_attempts = models.IntegerField(default=0)
+    total_points = models.IntegerField(default=0, help_text="Challenge points of every completed challenge")
+    total_score = models.IntegerField(default=0, help_text="Best scores of every completed challenge")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def in_progress_challenges(self):
+        return self.attempted_challenges - self.completed_challenges
+
+class UserCategoryStats(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='category_stats')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='user_stats')
+    attempted_challenges = models.IntegerField(default=0)
+    completed_challenges = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['user', 'category']
@@ -0,0 +1,80 @@
+"""
+The hot query paths and the index each must use, checked with EXPLAIN on
+SQLite and Postgres. Run by the tests and, against a real database, by
+``python manage.py check_query_plans``.
+"""
+import json
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Challenge, Discussion, Submission, UserProgress
+
+
+def hot_queries():
+    """(description, queryset, index the plan must use) for each hot query path"""
+    since = timezone.now() - timezone.timedelta(days=7)
+    return [
+        (
+            'latest submission status per challenge',
+            Submission.objects.filter(user_id=1, challenge_id=1).order_by('-created_at').values('status')[:1],
+            'submission_user_challenge_idx',
+        ),
+        (
+            'submission history',
+            Submission.objects.filter(user_id=1).order_by('-created_at', '-id')[:20],
+            'submission_history_idx',
+        ),
+        (
+            'passed submissions of a user',
+            Submission.objects.filter(user_id=1, status='passed').order_by().values('id'),
+            'submission_user_status_idx',
+        ),
+        (
+            'completed progress in a window',
+            UserProgress.objects.filter(user_id=1, status='completed', completed_at__gte=since),
+            'progress_completion_idx',
+        ),
+        (
+            'challenge list filter',
+            Challenge.objects.filter(category_id=1, difficulty='easy').order_by('-created_at')[:10],
+            'challenge_listing_idx',
+        ),
+        (
+            'discussion thread',
+            Discussion.objects.filter(challenge_id=1).order_by('-created_at', '-id')[:20],
+            'discussion_thread_idx',
+        ),
+    ]
+
+
+def _sqlite_indexes(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' '.join(row[-1] for row in cursor.fetchall())
+
+
+def _postgres_indexes(sql, params):
+    def walk(node):
+        if 'Index Name' in node:
+            yield node['Index Name']
+        for child in node.get('Plans', []):
+            yield from walk(child)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Tiny tables would otherwise be scanned sequentially whatever the
+        # indexes; this asks whether the planner *can* use one
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return ' '.join(walk(plan[0]['Plan']))
+
+
+def plan_indexes(queryset):
+    """The index names in the plan the current database chooses for ``queryset``"""
+    sql, params = queryset.query.sql_with_params()
+    if connection.vendor == 'sqlite':
+        return _sqlite_indexes(sql, params)
+    if connection.vendor == 'postgresql':
+        return _postgres_indexes(sql, params)
+    raise NotImplementedError(f'Query plans cannot be checked on {connection.vendor}')
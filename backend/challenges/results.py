@@ -0,0 +1,144 @@
+"""
+Compact storage for Submission.test_results.
+
+Judging produces one dict per test case that repeats the challenge's input
+and expected output. Stored rows keep only what the challenge can't give
+back::
+
+    {
+        'v': 1,
+        'n': 12,                  # number of test cases
+        'pass': '7ff',            # hex bitmap, bit i set when case i passed
+        'cpu': [0.012, ...],      # per-case CPU seconds, omitted if never timed
+        'cases': {                # only cases that differ from a clean pass
+            '3': {'v': 'Error', 'at': 40, 'out': '...', 'err': 0},
+        },
+        'texts': ['Traceback ...'],  # distinct error and stderr texts
+    }
+
+Inputs and expected outputs are referenced by test-case index. For an
+actual output that differs from the expected one, ``at`` is the length of
+their common prefix and ``out`` the rest of the actual output, truncated to
+TEST_RESULT_DETAIL_CHARS. Errors are stored once in ``texts`` and
+referenced by position, since a compile or import error repeats on every
+case. ``rehydrate`` rebuilds the full per-case list the API returns, reading
+the current test cases from the challenge. Rows in the old list format are
+returned as they are.
+"""
+import json
+from django.conf import settings
+
+FORMAT_VERSION = 1
+TRUNCATED = '\n... (truncated)'
+
+
+def case_io(challenge, test_case):
+    """The input and expected output shown for ``test_case``, as text"""
+    if challenge.test_mode == 'function':
+        return (
+            json.dumps({'args': test_case.get('args', []), 'kwargs': test_case.get('kwargs', {})}),
+            json.dumps(test_case.get('expected'))
+        )
+    return str(test_case.get('input', '') or '').strip(), str(test_case.get('output', '') or '').strip()
+
+
+def _truncate(text):
+    limit = getattr(settings, 'TEST_RESULT_DETAIL_CHARS', 1000)
+    return text if len(text) <= limit else text[:limit] + TRUNCATED
+
+
+def _common_prefix(a, b):
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+def is_compact(stored):
+    return isinstance(stored, dict) and stored.get('v') == FORMAT_VERSION
+
+
+def encode(results):
+    """Pack the per-case result dicts built by the judge"""
+    passed_bits = 0
+    cpu = []
+    cases = {}
+    texts = []
+
+    def text_ref(text):
+        text = _truncate(text)
+        if text not in texts:
+            texts.append(text)
+        return texts.index(text)
+
+    for i, result in enumerate(results):
+        passed = bool(result.get('passed'))
+        if passed:
+            passed_bits |= 1 << i
+        cpu_time = result.get('cpu_time')
+        cpu.append(round(cpu_time, 6) if cpu_time is not None else None)
+
+        detail = {}
+        verdict = result.get('verdict')
+        if verdict != 'Success':
+            detail['v'] = verdict
+        actual = result.get('actual_output') or ''
+        expected = str(result.get('expected_output', '') or '')
+        if actual != expected:
+            at = _common_prefix(actual, expected)
+            if at:
+                detail['at'] = at
+            detail['out'] = _truncate(actual[at:])
+        error = result.get('error') or ''
+        stderr = result.get('stderr') or ''
+        if error:
+            detail['err'] = text_ref(error)
+        if stderr != error:
+            detail['se'] = text_ref(stderr)
+        # A pass without a verdict is still a clean pass
+        if detail and not (passed and detail.keys() == {'v'} and verdict is None):
+            cases[str(i)] = detail
+
+    compact = {'v': FORMAT_VERSION, 'n': len(results), 'pass': format(passed_bits, 'x')}
+    if any(t is not None for t in cpu):
+        compact['cpu'] = cpu
+    if cases:
+        compact['cases'] = cases
+    if texts:
+        compact['texts'] = texts
+    return compact
+
+
+def rehydrate(stored, challenge):
+    """The full per-case result list for a stored ``test_results`` value"""
+    if not is_compact(stored):
+        return stored
+
+    passed_bits = int(stored['pass'], 16)
+    cpu = stored.get('cpu') or []
+    cases = stored.get('cases', {})
+    texts = stored.get('texts', [])
+    test_cases = challenge.test_cases or []
+    results = []
+    for i in range(stored['n']):
+        input_data, expected = case_io(challenge, test_cases[i]) if i < len(test_cases) else ('', '')
+        detail = cases.get(str(i), {})
+        if 'out' in detail:
+            actual = expected[:detail.get('at', 0)] + detail['out']
+        else:
+            actual = expected
+        error = texts[detail['err']] if 'err' in detail else None
+        results.append({
+            'test_case': i + 1,
+            'input': input_data,
+            'expected_output': expected,
+            'actual_output': actual,
+            'output': actual,  # Keep output for backward compatibility
+            'passed': bool(passed_bits >> i & 1),
+            'verdict': detail.get('v', 'Success'),
+            'cpu_time': cpu[i] if i < len(cpu) else None,
+            'stderr': texts[detail['se']] if 'se' in detail else error or '',
+            'error': error
+        })
+    return results
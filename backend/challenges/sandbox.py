@@ -0,0 +1,355 @@
+"""
+Linux isolation for judged programs.
+
+Each execution slot gets a cgroup v2 group that is created and configured
+once per process and then reused for every run. So are a network namespace
+(when EXECUTION_NETNS names one made with ``ip netns add``) and the seccomp
+filter, which is compiled once at import time. What is left in the child
+between fork and exec is a few syscalls: joining the cgroup, setns/unshare,
+dropping privileges and loading the filter.
+
+The child also gets its own view of the filesystem. Every mount becomes
+read-only. The EXECUTION_SANDBOX_HIDDEN_PATHS directories (the project,
+home directories) are covered with empty ones. The temp directory is
+replaced by a private tmpfs holding only the program's working directory.
+/proc shows only the program's own process, so /proc/<pid>/root cannot
+lead back into another process's view. The environment is reduced to
+EXECUTION_SANDBOX_ENV. Compilers run in the same sandbox as the programs
+they build.
+
+``python manage.py benchmark_sandbox`` measures what this adds per run.
+"""
+import ctypes
+import errno
+import os
+import platform
+import struct
+import tempfile
+from django.conf import settings
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUTS = 0x04000000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REMOUNT = 0x20
+MS_NOATIME = 0x400
+MS_NODIRATIME = 0x800
+MS_BIND = 0x1000
+MS_MOVE = 0x2000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+MS_RELATIME = 0x200000
+MS_STRICTATIME = 0x1000000
+
+# Per-mount options that must be kept when remounting: inside a user
+# namespace the kernel refuses to clear them
+MOUNT_OPTION_FLAGS = {
+    'nosuid': MS_NOSUID,
+    'nodev': MS_NODEV,
+    'noexec': MS_NOEXEC,
+    'noatime': MS_NOATIME,
+    'nodiratime': MS_NODIRATIME,
+    'relatime': MS_RELATIME,
+    'strictatime': MS_STRICTATIME,
+}
+
+# System-wide /proc files that runtimes read to size themselves
+PROC_FILES = ('cpuinfo', 'meminfo', 'stat', 'uptime', 'version')
+
+PR_SET_NO_NEW_PRIVS = 38
+PR_SET_SECCOMP = 22
+SECCOMP_MODE_FILTER = 2
+
+SECCOMP_RET_KILL_PROCESS = 0x80000000
+SECCOMP_RET_ERRNO = 0x00050000
+SECCOMP_RET_ALLOW = 0x7fff0000
+
+BPF_LD_W_ABS = 0x20
+BPF_JEQ_K = 0x15
+BPF_JGE_K = 0x35
+BPF_RET_K = 0x06
+
+X32_SYSCALL_BIT = 0x40000000
+
+# Syscalls a judged program never needs: networking, debugging other
+# processes, changing mounts or namespaces, kernel modules and keyrings.
+# They fail with EPERM rather than killing the program.
+DENIED_SYSCALLS = {
+    'x86_64': {
+        'audit_arch': 0xc000003e,
+        'syscalls': [
+            41, 42, 43, 49, 50, 288,  # socket, connect, accept, bind, listen, accept4
+            101, 310, 311,  # ptrace, process_vm_readv, process_vm_writev
+            155, 161, 165, 166,  # pivot_root, chroot, mount, umount2
+            272, 308,  # unshare, setns
+            167, 168, 169, 246, 320,  # swapon, swapoff, reboot, kexec_load, kexec_file_load
+            175, 176,  # init_module, delete_module
+            248, 249, 250,  # add_key, request_key, keyctl
+            298, 304, 321, 323,  # perf_event_open, open_by_handle_at, bpf, userfaultfd
+        ],
+    },
+    'aarch64': {
+        'audit_arch': 0xc00000b7,
+        'syscalls': [
+            198, 203, 202, 200, 201, 242,
+            117, 270, 271,
+            41, 51, 40, 39,
+            97, 268,
+            224, 225, 142, 104, 294,
+            105, 106,
+            217, 218, 219,
+            241, 265, 280, 282,
+        ],
+    },
+}
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+class SandboxError(Exception):
+    pass
+
+
+class _SockFprog(ctypes.Structure):
+    _fields_ = [('len', ctypes.c_ushort), ('filter', ctypes.c_void_p)]
+
+
+def _instruction(code, jt, jf, k):
+    return struct.pack('HBBI', code, jt, jf, k)
+
+
+def _build_seccomp_filter():
+    arch = DENIED_SYSCALLS.get(platform.machine())
+    if arch is None:
+        return None
+
+    deny = SECCOMP_RET_ERRNO | errno.EPERM
+    program = [
+        _instruction(BPF_LD_W_ABS, 0, 0, 4),  # seccomp_data.arch
+        _instruction(BPF_JEQ_K, 1, 0, arch['audit_arch']),
+        _instruction(BPF_RET_K, 0, 0, SECCOMP_RET_KILL_PROCESS),
+        _instruction(BPF_LD_W_ABS, 0, 0, 0),  # seccomp_data.nr
+    ]
+    if platform.machine() == 'x86_64':
+        # x32 syscall numbers would otherwise walk around the list below
+        program += [_instruction(BPF_JGE_K, 0, 1, X32_SYSCALL_BIT), _instruction(BPF_RET_K, 0, 0, deny)]
+    for number in arch['syscalls']:
+        program += [_instruction(BPF_JEQ_K, 0, 1, number), _instruction(BPF_RET_K, 0, 0, deny)]
+    program.append(_instruction(BPF_RET_K, 0, 0, SECCOMP_RET_ALLOW))
+
+    buffer = ctypes.create_string_buffer(b''.join(program))
+    fprog = _SockFprog(len(program), ctypes.addressof(buffer))
+    # Keep the instructions alive alongside the struct that points at them
+    return fprog, buffer
+
+
+_SECCOMP_FILTER = _build_seccomp_filter()
+
+# cgroups already configured by this process, so limits are written once
+_prepared_cgroups = set()
+
+
+def _check(result):
+    if result != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+
+
+def _write(path, value):
+    with open(path, 'w') as f:
+        f.write(value)
+
+
+def _mount(source, target, fstype, flags, data=None):
+    _check(_libc.mount(
+        source.encode() if source else None,
+        target.encode(),
+        fstype.encode() if fstype else None,
+        flags,
+        data.encode() if data else None
+    ))
+
+
+def _unescape(path):
+    # mountinfo writes space, tab, newline and backslash as octal escapes
+    for escaped, char in (('\\040', ' '), ('\\011', '\t'), ('\\012', '\n'), ('\\134', '\\')):
+        path = path.replace(escaped, char)
+    return path
+
+
+def _mounts():
+    """(mount point, flags to keep) for every mount, parents first"""
+    mounts = []
+    with open('/proc/self/mountinfo') as f:
+        for line in f:
+            fields = line.split()
+            flags = 0
+            for option in fields[5].split(','):
+                flags |= MOUNT_OPTION_FLAGS.get(option, 0)
+            mounts.append((_unescape(fields[4]), flags))
+    return mounts
+
+
+def _inside(path, directory):
+    return path == directory or path.startswith(directory.rstrip('/') + '/')
+
+
+def is_enabled():
+    return getattr(settings, 'EXECUTION_SANDBOX', False)
+
+
+class Sandbox:
+    """Isolation for the programs started in one execution slot"""
+
+    def __init__(self, slot):
+        self.hidden_paths = [
+            os.path.realpath(path) for path in getattr(settings, 'EXECUTION_SANDBOX_HIDDEN_PATHS', [])
+        ]
+        self.tmp_size = getattr(settings, 'EXECUTION_SANDBOX_TMP_SIZE', '64M')
+        root = getattr(settings, 'EXECUTION_CGROUP_ROOT', None)
+        self.cgroup = os.path.join(root, f'slot-{slot.index}') if root else None
+        self.netns = getattr(settings, 'EXECUTION_NETNS', None)
+        self.uid = getattr(settings, 'EXECUTION_SANDBOX_UID', 65534)
+        if self.cgroup and self.cgroup not in _prepared_cgroups:
+            self._prepare_cgroup()
+
+    def _prepare_cgroup(self):
+        """Create the slot's cgroup under the delegated root and set its limits"""
+        try:
+            os.makedirs(self.cgroup, exist_ok=True)
+            _write(os.path.join(self.cgroup, 'memory.max'), str(getattr(settings, 'EXECUTION_MEMORY_LIMIT', '256M')))
+            _write(os.path.join(self.cgroup, 'memory.swap.max'), '0')
+            _write(os.path.join(self.cgroup, 'pids.max'), str(getattr(settings, 'EXECUTION_PIDS_LIMIT', 64)))
+            # At most one core's worth of CPU time per period, whatever the program forks
+            _write(os.path.join(self.cgroup, 'cpu.max'), '100000 100000')
+        except OSError as e:
+            raise SandboxError(f"Cannot configure cgroup {self.cgroup}: {e}") from e
+        _prepared_cgroups.add(self.cgroup)
+
+    def grant(self, path):
+        """Hand a program's working directory to the sandbox user"""
+        if os.geteuid() != 0:
+            return
+        for dirpath, _, filenames in os.walk(path):
+            os.chown(dirpath, self.uid, self.uid)
+            for name in filenames:
+                os.chown(os.path.join(dirpath, name), self.uid, self.uid)
+
+    def environment(self, workdir):
+        """The environment a judged program starts with"""
+        env = {
+            name: os.environ[name]
+            for name in getattr(settings, 'EXECUTION_SANDBOX_ENV', ['PATH'])
+            if name in os.environ
+        }
+        env.update(HOME=workdir, TMPDIR=tempfile.gettempdir())
+        return env
+
+    def oom_kills(self):
+        """How many times the kernel has OOM-killed something in this slot's cgroup"""
+        if not self.cgroup:
+            return 0
+        with open(os.path.join(self.cgroup, 'memory.events')) as f:
+            for line in f:
+                key, value = line.split()
+                if key == 'oom_kill':
+                    return int(value)
+        return 0
+
+    def enter(self):
+        """Isolate the calling process. Runs in the child between fork and exec."""
+        if self.cgroup:
+            _write(os.path.join(self.cgroup, 'cgroup.procs'), '0')
+
+        privileged = os.geteuid() == 0
+        flags = CLONE_NEWNS | CLONE_NEWIPC | CLONE_NEWUTS
+        if self.netns and privileged:
+            # Joining the pre-created namespace is much cheaper than
+            # building (and later tearing down) a fresh one per run
+            fd = os.open(self.netns, os.O_RDONLY)
+            try:
+                _check(_libc.setns(fd, CLONE_NEWNET))
+            finally:
+                os.close(fd)
+        else:
+            flags |= CLONE_NEWNET
+
+        if privileged:
+            _check(_libc.unshare(flags))
+        else:
+            uid, gid = os.getuid(), os.getgid()
+            _check(_libc.unshare(flags | CLONE_NEWUSER))
+            _write('/proc/self/setgroups', 'deny')
+            _write('/proc/self/uid_map', f'{uid} {uid} 1')
+            _write('/proc/self/gid_map', f'{gid} {gid} 1')
+
+        # Nothing mounted in here may propagate back to the host
+        _check(_libc.mount(None, b'/', None, MS_REC | MS_PRIVATE, None))
+        self._isolate_filesystem()
+
+        if privileged:
+            os.setgroups([])
+            os.setgid(self.uid)
+            os.setuid(self.uid)
+
+        _check(_libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0))
+        if _SECCOMP_FILTER is not None:
+            fprog, _ = _SECCOMP_FILTER
+            _check(_libc.prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER, ctypes.byref(fprog), 0, 0))
+
+    def _isolate_filesystem(self):
+        """
+        Rebuild the calling process's view of the filesystem. Runs after
+        the mount namespace is made private, with the working directory
+        already set to the program's workdir.
+        """
+        workdir = os.getcwd()
+        tmp = os.path.realpath(tempfile.gettempdir())
+        existing = _mounts()
+
+        # A private temp directory holding only the workdir. The workdir is
+        # bound back through /proc/self/cwd, which still reaches it once
+        # the tmpfs covers its path.
+        _mount('tmpfs', tmp, 'tmpfs', MS_NOSUID | MS_NODEV, f'size={self.tmp_size},mode=1777')
+        os.makedirs(workdir, exist_ok=True)
+        _mount('/proc/self/cwd', workdir, None, MS_BIND)
+        os.chdir(workdir)
+
+        # The new /proc is staged in the private tmp and moved into place
+        # after the original is made read-only
+        staging = os.path.join(tmp, '.proc')
+        os.mkdir(staging)
+        _mount('tmpfs', staging, 'tmpfs', MS_NOSUID | MS_NODEV | MS_NOEXEC, 'size=64k,mode=555')
+        pid = str(os.getpid())
+        os.mkdir(os.path.join(staging, pid))
+        _mount(f'/proc/{pid}', os.path.join(staging, pid), None, MS_BIND | MS_REC)
+        os.symlink(pid, os.path.join(staging, 'self'))
+        for name in PROC_FILES:
+            if os.path.exists(f'/proc/{name}'):
+                open(os.path.join(staging, name), 'w').close()
+                _mount(f'/proc/{name}', os.path.join(staging, name), None, MS_BIND)
+
+        for target, flags in existing:
+            # The private tmp already covers anything mounted below it
+            if _inside(target, tmp):
+                continue
+            try:
+                _mount(None, target, None, MS_REMOUNT | MS_BIND | MS_RDONLY | flags)
+            except OSError as e:
+                # Mount points the process cannot reach need no remount
+                if e.errno not in (errno.ENOENT, errno.EACCES):
+                    raise
+
+        _mount(staging, '/proc', None, MS_MOVE)
+        os.rmdir(staging)
+        _mount(None, '/proc', None, MS_REMOUNT | MS_RDONLY | MS_NOSUID | MS_NODEV | MS_NOEXEC)
+
+        for path in self.hidden_paths:
+            if os.path.isdir(path) and not _inside(workdir, path):
+                _mount('tmpfs', path, 'tmpfs', MS_RDONLY | MS_NOSUID | MS_NODEV, 'size=4k,mode=755')
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Challenge, Category, Submission, Discussion, UserProgress, Achievement, UserAchievement
+from .fieldsets import SparseFieldsetMixin
+from . import results
 
 User = get_user_model()
 
@@ -14,35 +16,53 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ['id', 'name', 'description']
 
-class ChallengeSerializer(serializers.ModelSerializer):
+class ChallengeListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Challenge summary for lists. Leaves out content, template and test cases."""
     category = CategorySerializer(read_only=True)
-    category_name = serializers.CharField(write_only=True)
     submission_count = serializers.SerializerMethodField()
     user_status = serializers.SerializerMethodField()
-    test_cases = serializers.JSONField(required=False)
     created_by = UserSerializer(read_only=True)
 
     class Meta:
         model = Challenge
         fields = [
-            'id', 'title', 'description', 'category', 'category_name', 'difficulty',
-            'points', 'content', 'template', 'test_cases', 'time_limit',
-            'submission_count', 'user_status', 'created_at', 'created_by'
+            'id', 'title', 'description', 'category', 'difficulty', 'points',
+            'time_limit', 'test_mode', 'scoring', 'submission_count', 'user_status',
+            'created_at', 'created_by'
         ]
 
     def get_submission_count(self, obj):
+        # Annotated by ChallengeViewSet.get_queryset
+        if hasattr(obj, 'submission_total'):
+            return obj.submission_total
         return obj.submissions.count()
 
     def get_user_status(self, obj):
         user = self.context['request'].user
         if not user.is_authenticated:
             return None
+
+        if hasattr(obj, 'latest_submission_status'):
+            return obj.latest_submission_status or 'not_started'
         
         latest_submission = obj.submissions.filter(user=user).first()
         if not latest_submission:
             return 'not_started'
         return latest_submission.status
 
+class ChallengeSerializer(ChallengeListSerializer):
+    category_name = serializers.CharField(write_only=True)
+    test_cases = serializers.JSONField(required=False)
+
+    class Meta:
+        model = Challenge
+        fields = [
+            'id', 'title', 'description', 'category', 'category_name', 'difficulty',
+            'points', 'content', 'template', 'test_cases', 'time_limit', 'cpu_time_limit',
+            'test_mode', 'function_name', 'scoring', 'benchmark_runs', 'reference_time',
+            'submission_count', 'user_status', 'created_at', 'created_by'
+        ]
+
     def create(self, validated_data):
         category_name = validated_data.pop('category_name')
         category, _ = Category.objects.get_or_create(name=category_name)
@@ -60,18 +80,44 @@ class ChallengeSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
 
-class SubmissionSerializer(serializers.ModelSerializer):
-    challenge = ChallengeSerializer(read_only=True)
+class SubmissionChallengeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Challenge
+        fields = ['id', 'title']
+
+class SubmissionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    challenge = SubmissionChallengeSerializer(read_only=True)
     user = UserSerializer(read_only=True)
-    test_results = serializers.JSONField(read_only=True)
+    # Stored in a content-addressed CodeBlob; see Submission.code
+    code = serializers.CharField()
+    # Stored compactly; see challenges.results
+    test_results = serializers.SerializerMethodField()
 
     class Meta:
         model = Submission
         fields = [
             'id', 'challenge', 'user', 'code', 'language',
-            'status', 'feedback', 'test_results', 'created_at'
+            'status', 'feedback', 'test_results', 'execution_time',
+            'benchmark_median', 'benchmark_p95', 'created_at'
+        ]
+        read_only_fields = [
+            'status', 'feedback', 'test_results', 'execution_time',
+            'benchmark_median', 'benchmark_p95'
+        ]
+
+    def get_test_results(self, obj):
+        return results.rehydrate(obj.test_results, obj.challenge)
+
+class SubmissionListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Submission history entry, without the code and per-test results"""
+    challenge = SubmissionChallengeSerializer(read_only=True)
+
+    class Meta:
+        model = Submission
+        fields = [
+            'id', 'challenge', 'language', 'status', 'execution_time',
+            'benchmark_median', 'created_at'
         ]
-        read_only_fields = ['status', 'feedback', 'test_results']
 
 class DiscussionSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -84,7 +130,7 @@ class DiscussionSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
 
-class UserProgressSerializer(serializers.ModelSerializer):
+class UserProgressSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     challenge_title = serializers.CharField(source='challenge.title', read_only=True)
     
     class Meta:
@@ -95,6 +141,13 @@ class UserProgressSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['user']
 
+class SpeedLeaderboardSerializer(serializers.ModelSerializer):
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = UserProgress
+        fields = ['user', 'best_time', 'best_score', 'completed_at']
+
 class AchievementSerializer(serializers.ModelSerializer):
     earned = serializers.SerializerMethodField()
     earned_at = serializers.SerializerMethodField()
@@ -107,26 +160,27 @@ class AchievementSerializer(serializers.ModelSerializer):
             'earned', 'earned_at'
         ]
 
+    def get_earned_map(self):
+        """
+        achievement id -> earned_at for the requesting user. Loaded with one
+        query and kept in the serializer context, which every row (and any
+        serializer nesting this one) shares for the request.
+        """
+        if 'earned_achievements' not in self.context:
+            user = self.context['request'].user
+            earned = {}
+            if user.is_authenticated:
+                earned = dict(
+                    UserAchievement.objects.filter(user=user).values_list('achievement_id', 'earned_at')
+                )
+            self.context['earned_achievements'] = earned
+        return self.context['earned_achievements']
+
     def get_earned(self, obj):
-        user = self.context['request'].user
-        if not user.is_authenticated:
-            return False
-        return UserAchievement.objects.filter(
-            user=user,
-            achievement=obj
-        ).exists()
+        return obj.id in self.get_earned_map()
 
     def get_earned_at(self, obj):
-        user = self.context['request'].user
-        if not user.is_authenticated:
-            return None
-        
-        user_achievement = UserAchievement.objects.filter(
-            user=user,
-            achievement=obj
-        ).first()
-        
-        return user_achievement.earned_at if user_achievement else None
+        return self.get_earned_map().get(obj.id)
 
 class UserAchievementSerializer(serializers.ModelSerializer):
     achievement_details = AchievementSerializer(source='achievement', read_only=True)
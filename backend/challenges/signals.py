@@ -1,6 +1,13 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from .models import Submission, UserProgress
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+from .models import Submission, UserProgress, Achievement, Challenge, Category, UserAchievement
+from . import achievements, caching, stats
+
+# Sent by grading.record_attempt once a submission has been applied to the
+# user's progress. Arguments: progress, points_delta (change in the user's
+# total points), first_attempt (the progress row was just created) and
+# newly_completed (first completion of the challenge).
+submission_graded = Signal()
 
 @receiver(post_save, sender=Submission)
 def update_user_progress(sender, instance, created, **kwargs):
@@ -14,3 +21,41 @@ def update_user_progress(sender, instance, created, **kwargs):
         progress.attempts += 1
         progress.best_score = max(progress.best_score, instance.score)
         progress.save()
+
+@receiver(submission_graded)
+def update_user_stats(sender, progress, points_delta, first_attempt, newly_completed, **kwargs):
+    totals = stats.apply_attempt(progress, points_delta, first_attempt, newly_completed)
+    achievements.award_crossed(
+        progress.user_id,
+        points=totals.total_score,
+        completed=totals.completed_challenges,
+        points_delta=points_delta,
+        completed_delta=1 if newly_completed else 0
+    )
+
+@receiver(post_save, sender=Achievement)
+def award_to_qualifying_users(sender, instance, **kwargs):
+    achievements.award_existing(instance)
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def invalidate_cached_challenges(sender, **kwargs):
+    caching.bump('challenges')
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_cached_categories(sender, **kwargs):
+    caching.bump('categories')
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def invalidate_cached_achievements(sender, **kwargs):
+    # Registered after award_to_qualifying_users so new awards are included
+    caching.bump('achievements')
+
+@receiver(post_save, sender=Submission)
+@receiver(post_delete, sender=Submission)
+@receiver(post_save, sender=UserAchievement)
+@receiver(post_delete, sender=UserAchievement)
+def invalidate_cached_user_responses(sender, instance, **kwargs):
+    caching.bump_user(instance.user_id)
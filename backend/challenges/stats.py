@@ -0,0 +1,105 @@
+"""
+Denormalized per-user and per-category progress counters.
+
+Grading applies each attempt as F() increments, so the rows stay correct
+under concurrent submissions and the stats endpoints never aggregate over
+submissions. ``python manage.py rebuild_user_stats`` recomputes them from
+UserProgress if they ever drift (for example after challenges are deleted).
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q, Sum
+from .models import UserProgress, UserStats, UserCategoryStats
+
+
+def increment(model, lookup, **deltas):
+    """
+    Add ``deltas`` to the row matching ``lookup``, creating it if missing.
+    Returns True when this call created the row.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return False
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+        return True
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(**lookup).update(**changes)
+        return False
+
+
+def apply_attempt(progress, points_delta, first_attempt, newly_completed):
+    """
+    Count one graded attempt on ``progress.challenge`` and return the user's
+    updated UserStats row.
+    """
+    challenge = progress.challenge
+    attempted = 1 if first_attempt else 0
+    completed = 1 if newly_completed else 0
+
+    with transaction.atomic():
+        increment(
+            UserStats, {'user_id': progress.user_id},
+            attempted_challenges=attempted,
+            completed_challenges=completed,
+            total_attempts=1,
+            total_points=challenge.points if newly_completed else 0,
+            total_score=points_delta
+        )
+        if attempted or completed:
+            increment(
+                UserCategoryStats, {'user_id': progress.user_id, 'category_id': challenge.category_id},
+                attempted_challenges=attempted,
+                completed_challenges=completed
+            )
+        # Read back inside the transaction: our row lock makes this exactly
+        # the previous counters plus this attempt
+        return UserStats.objects.get(user_id=progress.user_id)
+
+
+def rebuild():
+    """Recompute every stats row from UserProgress"""
+    completed = Q(status='completed')
+    totals = UserProgress.objects.order_by().values('user').annotate(
+        attempted=Count('id'),
+        completed=Count('id', filter=completed),
+        attempts=Sum('attempts'),
+        points=Sum('challenge__points', filter=completed),
+        score=Sum('best_score', filter=completed)
+    )
+    by_category = UserProgress.objects.order_by().values('user', 'challenge__category').annotate(
+        attempted=Count('id'),
+        completed=Count('id', filter=completed)
+    )
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {UserStats._meta.db_table}')
+            cursor.execute(f'DELETE FROM {UserCategoryStats._meta.db_table}')
+        UserStats.objects.bulk_create(
+            [
+                UserStats(
+                    user_id=row['user'],
+                    attempted_challenges=row['attempted'],
+                    completed_challenges=row['completed'],
+                    total_attempts=row['attempts'] or 0,
+                    total_points=row['points'] or 0,
+                    total_score=row['score'] or 0
+                )
+                for row in totals.iterator()
+            ],
+            batch_size=1000
+        )
+        UserCategoryStats.objects.bulk_create(
+            [
+                UserCategoryStats(
+                    user_id=row['user'],
+                    category_id=row['challenge__category'],
+                    attempted_challenges=row['attempted'],
+                    completed_challenges=row['completed']
+                )
+                for row in by_category.iterator()
+            ],
+            batch_size=1000
+        )
@@ -0,0 +1,176 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from .execution import Program
+from .grading import record_attempt
+from .query_plans import hot_queries, plan_indexes
+from .models import Achievement, Category, Challenge, Submission, UserAchievement, UserProgress
+
+User = get_user_model()
+
+# Keep response and token caching out of the query counts
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, response.status_code
+    return len(queries)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ChallengeListQueryBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Strings')
+
+    def add_challenges(self, count):
+        for _ in range(count):
+            challenge = Challenge.objects.create(
+                title=f'Challenge {Challenge.objects.count()}', description='', content='',
+                category=self.category, created_by=self.user, points=10, test_cases=[]
+            )
+            Submission.objects.create(user=self.user, challenge=challenge, code='print(1)', language='python')
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self.add_challenges(3)
+        small = count_queries(self.client, '/api/challenges/challenges/')
+        self.add_challenges(7)
+        large = count_queries(self.client, '/api/challenges/challenges/')
+        self.assertEqual(small, large)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class AchievementQueryBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('collector', 'collector@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Start from no achievements rather than the seeded defaults
+        Achievement.objects.all().delete()
+
+    def add_achievements(self, count):
+        for _ in range(count):
+            # Out of reach, so none are awarded automatically
+            achievement = Achievement.objects.create(
+                name=f'Badge {Achievement.objects.count()}', description='', points_required=10 ** 6
+            )
+            UserAchievement.objects.create(user=self.user, achievement=achievement)
+            Achievement.objects.create(name=f'Locked {achievement.pk}', description='', points_required=10 ** 6)
+
+    def test_query_count_does_not_grow_with_achievements(self):
+        for url in ('/api/challenges/achievements/', '/api/challenges/user-achievements/'):
+            with self.subTest(url=url):
+                Achievement.objects.all().delete()
+                self.add_achievements(1)
+                small = count_queries(self.client, url)
+                self.add_achievements(2)
+                large = count_queries(self.client, url)
+                self.assertEqual(small, large)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PerformanceScoringTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('sprinter', 'sprinter@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.challenge = Challenge.objects.create(
+            title='Echo', description='', content='', category=Category.objects.create(name='IO'),
+            points=100, scoring='performance', reference_time=0.01, benchmark_runs=1,
+            test_cases=[{'input': '7', 'output': '7'}]
+        )
+
+    def submit(self):
+        response = self.client.post(
+            f'/api/challenges/challenges/{self.challenge.pk}/submit/',
+            {'code': 'print(input())', 'language': 'python'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        return response.data
+
+    def test_failed_benchmark_earns_no_points(self):
+        with mock.patch('challenges.views.benchmark', return_value=None):
+            submission = self.submit()
+        self.assertEqual(submission['status'], 'failed')
+        self.assertEqual(self.user.total_points, 0)
+
+    def test_benchmarked_solution_is_scored_on_speed(self):
+        result = {'median': 0.04, 'p95': 0.05, 'runs': [0.04]}
+        with mock.patch('challenges.views.benchmark', return_value=result):
+            submission = self.submit()
+        self.assertEqual(submission['status'], 'passed')
+        self.assertEqual(self.user.total_points, 25)
+
+
+class QueryPlanTests(TestCase):
+    def assert_hot_queries_use_indexes(self):
+        for description, queryset, index in hot_queries():
+            with self.subTest(description):
+                self.assertIn(index, plan_indexes(queryset))
+
+    @skipUnless(connection.vendor == 'sqlite', 'needs SQLite')
+    def test_hot_queries_use_indexes_on_sqlite(self):
+        self.assert_hot_queries_use_indexes()
+
+    @skipUnless(connection.vendor == 'postgresql', 'needs a Postgres database (DEBUG=False with PG* settings)')
+    def test_hot_queries_use_indexes_on_postgres(self):
+        self.assert_hot_queries_use_indexes()
+
+
+class RecordAttemptConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('racer', 'racer@example.com', 'pw')
+        category = Category.objects.create(name='Arrays')
+        self.challenge = Challenge.objects.create(
+            title='Sum', description='Add numbers', content='Add numbers',
+            category=category, points=50, test_cases=[]
+        )
+
+    def _submit(self, passed):
+        try:
+            record_attempt(self.user, self.challenge, passed, self.challenge.points)
+        finally:
+            connection.close()
+
+    def test_parallel_attempts_are_all_counted(self):
+        attempts = 80
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(self._submit, [i % 4 == 0 for i in range(attempts)]))
+
+        progress = UserProgress.objects.get(user=self.user, challenge=self.challenge)
+        self.assertEqual(progress.attempts, attempts)
+        self.assertEqual(progress.status, 'completed')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_points, self.challenge.points)
+
+    def test_deleted_challenge_is_not_retried_forever(self):
+        challenge = Challenge(
+            pk=self.challenge.pk + 1000, title='Gone', description='', content='',
+            category=self.challenge.category, points=10
+        )
+        with self.assertRaises(IntegrityError):
+            record_attempt(self.user, challenge, True, 10)
+
+
+@skipUnless(os.geteuid() == 0 and shutil.which('g++'), 'needs root for the sandbox and g++')
+@override_settings(EXECUTION_SANDBOX=True)
+class SandboxedCompileTests(SimpleTestCase):
+    def test_compiler_cannot_read_hidden_paths(self):
+        settings_file = os.path.join(settings.BASE_DIR, 'createathon', 'settings.py')
+        with Program(f'#include "{settings_file}"\nint main() {{ return 0; }}', 'cpp') as program:
+            error = program.compile_error
+        self.assertIsNotNone(error)
+        self.assertIn('No such file', error['stderr'])
+        self.assertNotIn('SECRET_KEY', error['stderr'])
@@ -11,6 +11,7 @@ router.register(r'achievements', views.AchievementViewSet)
 router.register(r'user-achievements', views.UserAchievementViewSet, basename='user-achievement')
 router.register(r'progress', views.UserProgressViewSet, basename='progress')
 router.register(r'stats', views.UserStatsViewSet, basename='user-stats')
+router.register(r'cache-stats', views.ResponseCacheStatsViewSet, basename='cache-stats')
 
 urlpatterns = [
     path('', include(router.urls)),
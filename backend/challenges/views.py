@@ -1,21 +1,34 @@
 from rest_framework import viewsets, permissions, status
-from rest_framework.authentication import TokenAuthentication
+from users.authentication import CachedTokenAuthentication
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Avg, Sum, Q
-from .models import Challenge, Category, Submission, Discussion, Achievement, UserAchievement, UserProgress
+from django.db.models import Count, Avg, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import (
+    Challenge, Category, Submission, Discussion, Achievement, UserAchievement, UserProgress,
+    UserStats, UserCategoryStats
+)
+from .pagination import KeysetPagination, ProgressCursorPagination
+from .caching import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .fieldsets import wants_field
+from . import caching
+from .grading import record_attempt
+from . import results
+from .results import case_io
+from .execution import (
+    ExecutionBusy, Program, benchmark, execute_code, get_time_limit,
+    run_function_cases, values_equal
+)
 from .serializers import (
-    ChallengeSerializer, CategorySerializer, SubmissionSerializer,
+    ChallengeSerializer, ChallengeListSerializer, CategorySerializer,
+    SubmissionSerializer, SubmissionListSerializer,
     DiscussionSerializer, AchievementSerializer, UserAchievementSerializer,
-    UserProgressSerializer, UserStatsSerializer
+    UserProgressSerializer, UserStatsSerializer, SpeedLeaderboardSerializer
 )
-from django.utils import timezone
 import requests
 import json
-import tempfile
-import subprocess
-import os
 
 # Language IDs for Judge0
 LANGUAGE_IDS = {
@@ -46,16 +59,29 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         # Write permissions are only allowed to the owner of the challenge
         return obj.created_by == request.user
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespaces = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
-class ChallengeViewSet(viewsets.ModelViewSet):
+    def get_conditional_state(self):
+        categories = Category.objects.all()
+        if self.action == 'retrieve':
+            categories = categories.filter(pk=self.kwargs['pk'])
+        state = categories.aggregate(updated=Max('updated_at'), count=Count('id'))
+        if self.action == 'retrieve' and not state['count']:
+            return None
+        return [state['updated'], state['count']], state['updated']
+
+class ChallengeViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    # user_status in the payload comes from the user's own submissions
+    cache_namespaces = ('challenges', 'categories')
+    cache_per_user = True
     queryset = Challenge.objects.all()
     serializer_class = ChallengeSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     # permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly, IsSuperUser]
 
@@ -64,8 +90,43 @@ class ChallengeViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated()]
         return super().get_permissions()
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ChallengeListSerializer
+        return ChallengeSerializer
+
     def get_queryset(self):
+        # submission_count and user_status come from subqueries so a page of
+        # challenges costs the same number of queries however long it is.
+        # Each is skipped when ?fields= leaves its field out.
+        request = self.request
         queryset = super().get_queryset()
+        related = [name for name in ('category', 'created_by') if wants_field(request, name)]
+        if related:
+            queryset = queryset.select_related(*related)
+
+        if wants_field(request, 'submission_count'):
+            submission_totals = Submission.objects.filter(
+                challenge=OuterRef('pk')
+            ).order_by().values('challenge').annotate(total=Count('id')).values('total')
+            queryset = queryset.annotate(submission_total=Coalesce(Subquery(submission_totals), Value(0)))
+
+        user = request.user
+        if user.is_authenticated and wants_field(request, 'user_status'):
+            latest_status = Submission.objects.filter(
+                challenge=OuterRef('pk'),
+                user=user
+            ).order_by('-created_at').values('status')[:1]
+            queryset = queryset.annotate(latest_submission_status=Subquery(latest_status))
+
+        if self.action == 'list':
+            # The large text and JSON columns are only needed on detail
+            queryset = queryset.defer('content', 'template', 'test_cases')
+        elif self.action == 'retrieve':
+            queryset = queryset.defer(*[
+                name for name in ('content', 'template', 'test_cases') if not wants_field(request, name)
+            ])
+
         category = self.request.query_params.get('category', None)
         difficulty = self.request.query_params.get('difficulty', None)
 
@@ -76,203 +137,189 @@ class ChallengeViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-created_at')
 
+    def get_conditional_state(self):
+        challenges = Challenge.objects.all()
+        submissions = Submission.objects.all()
+        if self.action == 'retrieve':
+            challenges = challenges.filter(pk=self.kwargs['pk'])
+            submissions = submissions.filter(challenge_id=self.kwargs['pk'])
+        state = challenges.aggregate(
+            updated=Max('updated_at'),
+            count=Count('id'),
+            category_updated=Max('category__updated_at')
+        )
+        if self.action == 'retrieve' and not state['count']:
+            return None
+        # Submission counts and user_status move with every new submission
+        latest_submission = submissions.order_by('-id').values_list('id', 'created_at').first() or (None, None)
+
+        changes = [state['updated'], state['category_updated'], latest_submission[1]]
+        last_modified = max((change for change in changes if change), default=None)
+        return [state['updated'], state['count'], state['category_updated'], latest_submission[0]], last_modified
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
-    def execute_code(self, code, language, input_data):
-        """Execute code using subprocess with support for Python, JavaScript, Java, and C++"""
-        try:
-            # Create a temporary file with appropriate extension
-            language_configs = {
-                'python': {
-                    'extension': '.py',
-                    'run_command': ['python'],
-                    'compile_required': False
-                },
-                'javascript': {
-                    'extension': '.js',
-                    'run_command': ['node'],
-                    'compile_required': False
-                },
-                'java': {
-                    'extension': '.java',
-                    'run_command': ['java'],
-                    'compile_command': ['javac'],
-                    'compile_required': True,
-                    'class_based': True
-                },
-                'cpp': {
-                    'extension': '.cpp',
-                    'run_command': None,  # Will be compiled
-                    'compile_command': ['g++', '-o'],
-                    'compile_required': True
-                }
-            }
-
-            # Default to Python if language not recognized
-            config = language_configs.get(language, language_configs['python'])
-            
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(suffix=config['extension'], mode='w', delete=False) as f:
-                f.write(code)
-                temp_file = f.name
-
-            try:
-                # Compilation for Java and C++
-                if config.get('compile_required', False):
-                    if language == 'java':
-                        # Java compilation
-                        compile_process = subprocess.run(
-                            config['compile_command'] + [temp_file],
-                            capture_output=True,
-                            text=True
-                        )
-                        
-                        if compile_process.returncode != 0:
-                            return {
-                                "stdout": "",
-                                "stderr": compile_process.stderr,
-                                "error": "Compilation Error: " + compile_process.stderr,
-                                "status": "Compilation Error"
-                            }
-                        
-                        # For Java, use the class name (filename without extension)
-                        run_command = config['run_command'] + [os.path.splitext(os.path.basename(temp_file))[0]]
-                    
-                    elif language == 'cpp':
-                        # C++ compilation
-                        compile_output = temp_file + '.out'
-                        compile_process = subprocess.run(
-                            config['compile_command'] + [compile_output, temp_file],
-                            capture_output=True,
-                            text=True
-                        )
-                        
-                        if compile_process.returncode != 0:
-                            return {
-                                "stdout": "",
-                                "stderr": compile_process.stderr,
-                                "error": "Compilation Error: " + compile_process.stderr,
-                                "status": "Compilation Error"
-                            }
-                        
-                        run_command = [compile_output]
-                else:
-                    # For Python and JavaScript
-                    run_command = config['run_command'] + [temp_file]
-
-                # Run the code
-                process = subprocess.run(
-                    run_command,
-                    input=input_data,
-                    text=True,
-                    capture_output=True,
-                    timeout=5  # 5 second timeout
-                )
-                
-                # Check for runtime errors
-                if process.returncode != 0:
-                    return {
-                        "stdout": process.stdout,
-                        "stderr": process.stderr or f"Error: Program exited with code {process.returncode}",
-                        "error": process.stderr or f"Error: Program exited with code {process.returncode}",
-                        "status": "Error"
-                    }
-                
-                return {
-                    "stdout": process.stdout,
-                    "stderr": process.stderr,
-                    "error": None,
-                    "status": "Success"
-                }
-                
-            finally:
-                # Clean up temporary files
-                os.unlink(temp_file)
-                if language == 'cpp':
-                    compiled_file = temp_file + '.out'
-                    if os.path.exists(compiled_file):
-                        os.unlink(compiled_file)
-                elif language == 'java':
-                    # Remove compiled .class file
-                    class_file = os.path.splitext(temp_file)[0] + '.class'
-                    if os.path.exists(class_file):
-                        os.unlink(class_file)
-        
-        except subprocess.TimeoutExpired:
-            return {
-                "stdout": "",
-                "stderr": "Execution timed out after 5 seconds",
-                "error": "Execution timed out after 5 seconds",
-                "status": "Timeout"
-            }
-        except Exception as e:
-            error_msg = str(e)
-            return {
-                "stdout": "",
-                "stderr": error_msg,
-                "error": error_msg,
-                "status": "Error"
-            }
+    def execute_code(self, code, language, input_data, time_limit):
+        """Execute code in a fresh process with Python, JavaScript, Java, and C++ support"""
+        return execute_code(code, language, input_data, time_limit)
 
     def process_test_cases(self, challenge, code, language):
-        """Process all test cases for a challenge"""
+        """
+        Process all test cases for a challenge, compiling the code only once.
+        Accepted code on a performance-scored challenge is then benchmarked.
+        """
+        if challenge.test_mode == 'function':
+            return self.process_function_cases(challenge, code, language)
+
         test_results = []
+        benchmark_result = None
         all_passed = True
+        time_limit = get_time_limit(challenge, language)
         
-        for i, test_case in enumerate(challenge.test_cases):
-            try:
-                # Safely handle None values for input and output
-                input_data = str(test_case.get('input', ''))
-                expected_output = str(test_case.get('output', ''))
-                
-                # Only strip if the values are not empty
-                input_data = input_data.strip() if input_data else ''
-                expected_output = expected_output.strip() if expected_output else ''
-                
-                # Execute code
-                result = self.execute_code(code, language, input_data)
-                actual_output = (result.get("stdout", "") or "").strip()
-                stderr = result.get("stderr", "")
-                error = result.get("error", "")
-                
-                # Check if test case passed (no errors and output matches)
-                passed = not stderr and not error and actual_output == expected_output
-                if not passed:
+        with Program(code, language) as program:
+            for i, test_case in enumerate(challenge.test_cases):
+                try:
+                    input_data, expected_output = case_io(challenge, test_case)
+
+                    # Execute code
+                    result = program.run(input_data, time_limit)
+                    actual_output = (result.get("stdout", "") or "").strip()
+                    stderr = result.get("stderr", "")
+                    error = result.get("error", "")
+                    
+                    # Check if test case passed (no errors and output matches)
+                    passed = not stderr and not error and actual_output == expected_output
+                    if not passed:
+                        all_passed = False
+                    
+                    test_results.append({
+                        'test_case': i + 1,
+                        'input': input_data,
+                        'expected_output': expected_output,
+                        'actual_output': actual_output,
+                        'output': actual_output,  # Keep output for backward compatibility
+                        'passed': passed,
+                        'verdict': result.get('status'),
+                        'cpu_time': result.get('cpu_time'),
+                        'stderr': stderr,
+                        'error': error
+                    })
+                except Exception as e:
+                    error_msg = str(e)
+                    test_results.append({
+                        'test_case': i + 1,
+                        'input': str(test_case.get('input', '')),
+                        'expected_output': str(test_case.get('output', '')),
+                        'actual_output': '',
+                        'output': '',
+                        'passed': False,
+                        'verdict': 'Error',
+                        'cpu_time': None,
+                        'stderr': error_msg,
+                        'error': error_msg
+                    })
+                    all_passed = False
+
+            if all_passed and challenge.scoring == 'performance':
+                benchmark_result = benchmark(
+                    program, challenge.benchmark_inputs, time_limit, challenge.benchmark_runs
+                )
+                # A solution that fails or times out on the benchmark inputs
+                # is not accepted, rather than scored as if it were instant
+                if benchmark_result is None:
                     all_passed = False
-                
-                test_results.append({
-                    'test_case': i + 1,
-                    'input': input_data,
-                    'expected_output': expected_output,
-                    'actual_output': actual_output,
-                    'output': actual_output,  # Keep output for backward compatibility
-                    'passed': passed,
-                    'stderr': stderr,
-                    'error': error
-                })
-            except Exception as e:
-                error_msg = str(e)
-                test_results.append({
-                    'test_case': i + 1,
-                    'input': str(test_case.get('input', '')),
-                    'expected_output': str(test_case.get('output', '')),
-                    'actual_output': '',
-                    'output': '',
-                    'passed': False,
-                    'stderr': error_msg,
-                    'error': error_msg
-                })
-                all_passed = False
         
-        return test_results, all_passed
+        return test_results, all_passed, benchmark_result
+
+    def process_function_cases(self, challenge, code, language):
+        """
+        Judge a function-mode challenge: the solution is imported once and
+        its function is called with each case's arguments. Return values are
+        compared structurally with the expected values.
+        """
+        cases = challenge.test_cases
+        if language != 'python':
+            error = 'Function test mode only supports Python submissions'
+            outcomes = [{'status': 'Error', 'value': None, 'error': error, 'cpu_time': None} for _ in cases]
+        else:
+            with Program(code, language) as program:
+                outcomes = run_function_cases(
+                    program, challenge.function_name, cases, get_time_limit(challenge, language)
+                )
+
+        test_results = []
+        # Never pass a submission on a short report
+        all_passed = len(outcomes) == len(cases)
+        for i, (test_case, outcome) in enumerate(zip(cases, outcomes)):
+            expected = test_case.get('expected')
+            passed = outcome['status'] == 'Success' and values_equal(outcome['value'], expected)
+            if not passed:
+                all_passed = False
+
+            actual_output = json.dumps(outcome['value']) if outcome['status'] == 'Success' else ''
+            input_data, expected_output = case_io(challenge, test_case)
+            test_results.append({
+                'test_case': i + 1,
+                'input': input_data,
+                'expected_output': expected_output,
+                'actual_output': actual_output,
+                'output': actual_output,  # Keep output for backward compatibility
+                'passed': passed,
+                'verdict': outcome['status'],
+                'cpu_time': outcome['cpu_time'],
+                'stderr': outcome['error'] or '',
+                'error': outcome['error']
+            })
+
+        # Benchmarks replay stdin inputs, so function-mode challenges are
+        # always scored on correctness.
+        return test_results, all_passed, None
+
+    def run_function(self, challenge, code, language, data):
+        """
+        Call a function-mode challenge's function once. The arguments come
+        from ``args``/``kwargs`` or from ``input`` in the form the challenge
+        shows its cases: {"args": [...], "kwargs": {...}}.
+        """
+        if language != 'python':
+            return Response(
+                {'detail': 'Function test mode only supports Python submissions.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        call = {'args': data.get('args'), 'kwargs': data.get('kwargs')}
+        if call['args'] is None and call['kwargs'] is None:
+            call = data.get('input') or {}
+            if isinstance(call, str):
+                try:
+                    call = json.loads(call)
+                except ValueError:
+                    call = None
+        if isinstance(call, dict):
+            call = {'args': call.get('args') or [], 'kwargs': call.get('kwargs') or {}}
+        if not isinstance(call, dict) or not isinstance(call['args'], list) or not isinstance(call['kwargs'], dict):
+            return Response(
+                {'detail': 'Input must be JSON like {"args": [...], "kwargs": {...}}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with Program(code, language) as program:
+            outcome, = run_function_cases(
+                program, challenge.function_name, [call],
+                get_time_limit(challenge, language)
+            )
+        if outcome['status'] != 'Success':
+            return Response({'error': outcome['error'], 'output': ''})
+        return Response({'output': json.dumps(outcome['value']), 'error': None})
 
     @action(detail=True, methods=['get'])
     def submissions(self, request, pk=None):
         challenge = self.get_object()
-        submissions = challenge.submissions.filter(user=request.user)
-        serializer = SubmissionSerializer(submissions, many=True, context={'request': request})
-        return Response(serializer.data)
+        submissions = challenge.submissions.filter(user=request.user).select_related('challenge', 'user', 'code_blob')
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(submissions, request, view=self)
+        serializer = SubmissionSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def run(self, request, pk=None):
@@ -296,8 +343,11 @@ class ChallengeViewSet(viewsets.ModelViewSet):
             )
         
         try:
+            if challenge.test_mode == 'function':
+                return self.run_function(challenge, code, language, request.data)
+
             # Execute the code with the provided input
-            result = self.execute_code(code, language, input_data)
+            result = self.execute_code(code, language, input_data, get_time_limit(challenge, language))
             
             # Check for execution errors
             if result.get('status') == 'Error':
@@ -312,6 +362,11 @@ class ChallengeViewSet(viewsets.ModelViewSet):
                 'error': result.get('stderr', None)
             })
             
+        except ExecutionBusy:
+            return Response(
+                {'detail': 'All code runners are busy, please try again.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
@@ -336,26 +391,24 @@ class ChallengeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        test_results, all_passed = self.process_test_cases(challenge, code, language)
+        try:
+            test_results, all_passed, benchmark_result = self.process_test_cases(challenge, code, language)
+        except ExecutionBusy:
+            return Response(
+                {'detail': 'All code runners are busy, please try again.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        cpu_times = [r['cpu_time'] for r in test_results if r.get('cpu_time') is not None]
         
         # Update user progress
-        progress, created = UserProgress.objects.get_or_create(
-            user=request.user,
-            challenge=challenge,
-            defaults={'status': 'in_progress'}
+        score = challenge.points
+        if benchmark_result:
+            score = challenge.performance_score(benchmark_result['median'])
+        record_attempt(
+            request.user, challenge, all_passed, score,
+            best_time=benchmark_result['median'] if benchmark_result else None
         )
         
-        progress.attempts += 1
-        if all_passed:
-            progress.status = 'completed'
-            progress.completed_at = timezone.now()
-            current_score = challenge.points
-            progress.current_score = current_score
-            if current_score > progress.best_score:
-                progress.best_score = current_score
-        
-        progress.save()
-        
         # Create the submission
         submission = Submission.objects.create(
             user=request.user,
@@ -363,12 +416,34 @@ class ChallengeViewSet(viewsets.ModelViewSet):
             code=code,
             language=language,
             status='passed' if all_passed else 'failed',
-            test_results=test_results
+            test_results=results.encode(test_results),
+            execution_time=max(cpu_times, default=None),
+            benchmark_median=benchmark_result['median'] if benchmark_result else None,
+            benchmark_p95=benchmark_result['p95'] if benchmark_result else None
         )
         
         serializer = SubmissionSerializer(submission, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='speed-leaderboard')
+    def speed_leaderboard(self, request, pk=None):
+        """Fastest accepted solutions of a performance-scored challenge"""
+        challenge = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(max(limit, 1), 100)
+        entries = UserProgress.objects.filter(
+            challenge=challenge,
+            best_time__isnull=False
+        ).select_related('user').order_by('best_time')[:limit]
+        serializer = SpeedLeaderboardSerializer(entries, many=True, context={'request': request})
+        return Response(serializer.data)
+
     @action(detail=True, methods=['get', 'post'])
     def discussions(self, request, pk=None):
         challenge = self.get_object()
@@ -397,17 +472,44 @@ class ChallengeViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
             
         # GET method
-        discussions = challenge.discussions.all()
-        serializer = DiscussionSerializer(discussions, many=True, context={'request': request})
-        return Response(serializer.data)
+        discussions = challenge.discussions.select_related('user')
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(discussions, request, view=self)
+        serializer = DiscussionSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
 class SubmissionViewSet(viewsets.ModelViewSet):
     serializer_class = SubmissionSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return SubmissionListSerializer
+        return SubmissionSerializer
 
     def get_queryset(self):
-        return Submission.objects.filter(user=self.request.user)
+        queryset = Submission.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            # created_at is always loaded: the cursor paginates on it
+            columns = ['id', 'created_at'] + [
+                name for name in ('language', 'status', 'execution_time', 'benchmark_median')
+                if wants_field(self.request, name)
+            ]
+            if wants_field(self.request, 'challenge'):
+                queryset = queryset.select_related('challenge')
+                columns += ['challenge__id', 'challenge__title']
+            return queryset.only(*columns)
+        related = [name for name in ('challenge', 'user') if wants_field(self.request, name)]
+        if wants_field(self.request, 'test_results') and 'challenge' not in related:
+            # Stored results reference the challenge's test cases
+            related.append('challenge')
+        if wants_field(self.request, 'code'):
+            related.append('code_blob')
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
 
     def perform_create(self, serializer):
         challenge_id = serializer.validated_data.get('challenge')
@@ -451,29 +553,14 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 all_passed = False
         
         # Update user progress
-        progress, created = UserProgress.objects.get_or_create(
-            user=self.request.user,
-            challenge=challenge,
-            defaults={'status': 'in_progress'}
-        )
-        
-        progress.attempts += 1
-        if all_passed:
-            progress.status = 'completed'
-            progress.completed_at = timezone.now()
-            current_score = challenge.points
-            progress.current_score = current_score
-            if current_score > progress.best_score:
-                progress.best_score = current_score
-        
-        progress.save()
+        record_attempt(self.request.user, challenge, all_passed, challenge.points)
         
         # Save the submission with results
         submission = serializer.save(
             user=self.request.user,
             challenge=challenge,
             status='passed' if all_passed else 'failed',
-            test_results=test_results
+            test_results=results.encode(test_results)
         )
 
 class DiscussionViewSet(viewsets.ModelViewSet):
@@ -487,54 +574,39 @@ class DiscussionViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 class UserStatsViewSet(viewsets.ViewSet):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def list(self, request):
         user = request.user
-        total_points = Submission.objects.filter(
-            user=user,
-            status='passed'
-        ).aggregate(
-            total_points=Sum('challenge__points')
-        )['total_points'] or 0
-
-        completed_challenges = Challenge.objects.filter(
-            submissions__user=user,
-            submissions__status='passed'
-        ).distinct().count()
-
-        in_progress_challenges = Challenge.objects.filter(
-            submissions__user=user
-        ).exclude(
-            submissions__status='passed'
-        ).distinct().count()
+        stats = UserStats.objects.filter(user=user).first() or UserStats(user=user)
 
+        completed_in_category = UserCategoryStats.objects.filter(
+            user=user,
+            category=OuterRef('pk')
+        ).values('completed_challenges')
         category_progress = Category.objects.annotate(
             total_challenges=Count('challenges'),
-            completed_challenges=Count(
-                'challenges',
-                filter=Q(
-                    challenges__submissions__user=user,
-                    challenges__submissions__status='passed'
-                )
-            )
+            completed_challenges=Coalesce(Subquery(completed_in_category), Value(0))
         ).values('name', 'total_challenges', 'completed_challenges')
 
         data = {
-            'total_points': total_points,
-            'completed_challenges': completed_challenges,
-            'in_progress_challenges': in_progress_challenges,
+            'total_points': stats.total_points,
+            'completed_challenges': stats.completed_challenges,
+            'in_progress_challenges': stats.in_progress_challenges,
             'category_progress': list(category_progress)
         }
 
         serializer = UserStatsSerializer(data)
         return Response(serializer.data)
 
-class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
+class AchievementViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    # earned/earned_at depend on the requesting user
+    cache_namespaces = ('achievements',)
+    cache_per_user = True
     queryset = Achievement.objects.all()
     serializer_class = AchievementSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
 class UserAchievementViewSet(viewsets.ReadOnlyModelViewSet):
@@ -542,23 +614,34 @@ class UserAchievementViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return UserAchievement.objects.filter(user=self.request.user)
+        return UserAchievement.objects.filter(user=self.request.user).select_related('achievement')
 
 class UserProgressViewSet(viewsets.ModelViewSet):
     serializer_class = UserProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ProgressCursorPagination
 
     def get_queryset(self):
-        return UserProgress.objects.filter(user=self.request.user)
+        queryset = UserProgress.objects.filter(user=self.request.user)
+        if wants_field(self.request, 'challenge_title'):
+            queryset = queryset.select_related('challenge')
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        stats = UserProgress.objects.filter(user=request.user).aggregate(
-            total_completed=Count('id', filter={'status': 'completed'}),
-            total_points=Sum('best_score'),
-            total_attempts=Count('attempts')
-        )
-        return Response(stats)
+        stats = UserStats.objects.filter(user=request.user).first() or UserStats(user=request.user)
+        return Response({
+            'total_completed': stats.completed_challenges,
+            'total_points': stats.total_score,
+            'total_attempts': stats.total_attempts
+        })
+
+class ResponseCacheStatsViewSet(viewsets.ViewSet):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request):
+        return Response(caching.stats(['categories', 'challenges', 'achievements']))
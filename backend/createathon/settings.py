@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -74,6 +75,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than memory, so tests can write from several threads
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'createathon-test.sqlite3')},
     }
 }
 
@@ -127,7 +130,7 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -143,9 +146,82 @@ SIMPLE_JWT = {
     #Generate refresh Token after 30 minutes if user token gets exprire then user can use refresh token to get new token
 }
 
+# Cache shared by all worker processes on the host
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'createathon-cache')),
+        # Tokens, profile stats and responses are one file each; past this
+        # many files every set() deletes a random third of them. Every set()
+        # also lists the whole directory first (about 2.5 microseconds per
+        # file, so ~5 ms at 2000), which makes this bound the cost of a write.
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 2000))},
+    }
+}
+
+# Windowed leaderboards keep their top K users cached. refresh_leaderboards
+# recomputes them and is meant to run from a scheduler more often than this.
+LEADERBOARD_WINDOW_TOP_K = 100
+LEADERBOARD_WINDOW_CACHE_SECONDS = 600
+
+# Cached category, challenge and achievement responses; model changes
+# invalidate them, this bounds how stale aggregate counts can get
+RESPONSE_CACHE_SECONDS = 60
+
+# Per-user stats on /users/me/, also dropped when the user's progress changes
+PROFILE_STATS_CACHE_SECONDS = 300
+
+# Longest failing output or error kept per test case in Submission.test_results
+TEST_RESULT_DETAIL_CHARS = 1000
+
 # Token Settings
 TOKEN_EXPIRED_AFTER_SECONDS = 3600  # 1 hour
+TOKEN_CACHE_SECONDS = 60  # How long an authenticated token is served from the cache
 REFRESH_TOKEN_EXPIRED_AFTER_DAYS = 7
+REFRESH_TOKENS_PER_USER = 5  # Oldest are dropped on login beyond this
+
+# Code execution settings
+# Challenge.cpu_time_limit is multiplied by the language factor to get the
+# per-test CPU limit. Programs get EXECUTION_WALL_TIME_FACTOR times that in
+# wall-clock time before they are treated as stalled and killed.
+EXECUTION_TIME_MULTIPLIERS = {
+    'python': 3.0,
+    'javascript': 2.0,
+    'java': 2.0,
+    'cpp': 1.0,
+}
+EXECUTION_WALL_TIME_FACTOR = 2.0
+EXECUTION_COMPILE_TIMEOUT = 30  # seconds
+
+# Execution slots. Each core listed in EXECUTION_CORES becomes one slot and
+# judged programs are pinned to it; web workers are pinned to
+# EXECUTION_RESERVED_CORES so they never compete with them. Leave both empty
+# to run unpinned with one slot per CPU. Example: EXECUTION_CORES="2,3,4,5"
+EXECUTION_CORES = [int(core) for core in os.environ.get('EXECUTION_CORES', '').split(',') if core.strip()]
+EXECUTION_RESERVED_CORES = [int(core) for core in os.environ.get('EXECUTION_RESERVED_CORES', '').split(',') if core.strip()]
+EXECUTION_SLOT_WAIT = 30  # seconds to wait for a free slot before giving up
+
+# Sandbox (Linux only). Judged programs get their own mount, IPC, UTS and
+# network namespaces, a seccomp filter and, as root, the EXECUTION_SANDBOX_UID
+# user. With EXECUTION_CGROUP_ROOT set (a cgroup v2 directory delegated to
+# the web user, e.g. /sys/fs/cgroup/createathon) each slot gets a cgroup
+# holding the memory/pids/CPU limits below. EXECUTION_NETNS may name a network
+# namespace created ahead of time with `ip netns add judge` (/run/netns/judge).
+EXECUTION_SANDBOX = os.environ.get('EXECUTION_SANDBOX', 'False') == 'True'
+EXECUTION_CGROUP_ROOT = os.environ.get('EXECUTION_CGROUP_ROOT')
+EXECUTION_NETNS = os.environ.get('EXECUTION_NETNS')
+EXECUTION_SANDBOX_UID = 65534  # nobody
+EXECUTION_MEMORY_LIMIT = '256M'
+EXECUTION_PIDS_LIMIT = 64
+# Inside the sandbox the filesystem is read-only and these directories are
+# replaced by empty ones. Compilers and interpreters must live elsewhere.
+EXECUTION_SANDBOX_HIDDEN_PATHS = [
+    path for path in os.environ.get('EXECUTION_SANDBOX_HIDDEN_PATHS', f'{BASE_DIR},/home,/root').split(',') if path
+]
+EXECUTION_SANDBOX_TMP_SIZE = '64M'  # Private, writable temp directory
+# Environment variables judged programs inherit; everything else (secret
+# key, database credentials) is dropped
+EXECUTION_SANDBOX_ENV = ['PATH', 'LANG', 'LC_ALL', 'JAVA_HOME']
 
 # CORS settings
 # For the frontend for the secure cookie to be sent, the frontend must be on the same domain as the backend
@@ -0,0 +1,94 @@
+"""
+Token authentication backed by the shared cache.
+
+A token is looked up in the database once per TOKEN_CACHE_SECONDS and then
+served from the cache; deleting the token, saving its user or changing
+their points drops the cached copy (see users.signals). Tokens older than
+TOKEN_EXPIRED_AFTER_SECONDS are rejected, and ``issue_token`` replaces them.
+
+Refresh tokens are single use: ``rotate_refresh_token`` consumes the one
+presented and issues its successor. Each user keeps at most
+REFRESH_TOKENS_PER_USER of them (one per signed-in device), and expired
+rows are removed by ``python manage.py sweep_refresh_tokens``.
+"""
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from .models import RefreshToken
+
+
+def _cache_key(key):
+    # Keep raw credentials out of cache keys
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def is_expired(token):
+    lifetime = timedelta(seconds=settings.TOKEN_EXPIRED_AFTER_SECONDS)
+    return token.created + lifetime < timezone.now()
+
+
+def forget_token(key):
+    cache.delete(_cache_key(key))
+
+
+def forget_user(user_id):
+    """Drop the cached tokens of a user, which carry a copy of the user"""
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        forget_token(key)
+
+
+def issue_token(user):
+    """The user's access token, replaced with a fresh one if it has expired"""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and is_expired(token):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+def issue_refresh_token(user):
+    """A new refresh token for ``user``, dropping their oldest beyond the cap"""
+    keep = settings.REFRESH_TOKENS_PER_USER - 1
+    stale = list(
+        RefreshToken.objects.filter(user=user).order_by('-created_at', '-id').values_list('id', flat=True)[keep:]
+    )
+    if stale:
+        RefreshToken.objects.filter(id__in=stale).delete()
+    return RefreshToken.objects.create(user=user)
+
+
+def rotate_refresh_token(value):
+    """
+    Consume the refresh token ``value`` and return (user, new refresh token),
+    or None if it is unknown, expired or was already used by another request.
+    """
+    refresh_token = RefreshToken.objects.select_related('user').filter(token=value).first()
+    if refresh_token is None:
+        return None
+    # Deleting is the claim: of two requests presenting the same token only one deletes it
+    claimed, _ = RefreshToken.objects.filter(pk=refresh_token.pk).delete()
+    if not claimed or not refresh_token.is_valid:
+        return None
+    return refresh_token.user, RefreshToken.objects.create(user=refresh_token.user)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        token = cache.get(_cache_key(key))
+        if token is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            cache.set(_cache_key(key), token, settings.TOKEN_CACHE_SECONDS)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        if is_expired(token):
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        return (token.user, token)
@@ -0,0 +1,221 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from challenges.stats import increment
+from .models import LeaderboardEntry, LeaderboardScore, DailyScore
+
+# Days covered by the named leaderboard timeframes
+WINDOWS = {
+    'week': 7,
+    'month': 30,
+}
+MAX_WINDOW_DAYS = 31
+MAX_NEIGHBORS = 25
+
+
+def _bump_score(points, change):
+    """Move ``change`` users into (or out of) the histogram bucket for ``points``"""
+    increment(LeaderboardScore, {'points': points}, users=change)
+
+
+def apply_score_delta(user_id, points_delta, completed_delta=0):
+    """Apply a grading result to the user's leaderboard entry and the score histogram"""
+    if not points_delta and not completed_delta:
+        return
+
+    with transaction.atomic():
+        # Write before reading: the entry stays locked by us from here on, so
+        # the score read back is exactly the previous score plus our delta.
+        created = increment(
+            LeaderboardEntry, {'user_id': user_id},
+            points=points_delta,
+            completed_challenges=completed_delta
+        )
+        if created:
+            _bump_score(points_delta, 1)
+            return
+
+        if points_delta:
+            points = LeaderboardEntry.objects.filter(user_id=user_id).values_list('points', flat=True).get()
+            _bump_score(points - points_delta, -1)
+            _bump_score(points, 1)
+
+
+def add_daily_score(user_id, points_delta, completed_delta=0):
+    """Add a grading result to today's bucket for the user"""
+    if not points_delta and not completed_delta:
+        return
+    increment(
+        DailyScore, {'user_id': user_id, 'day': timezone.localdate()},
+        points=points_delta,
+        completed_challenges=completed_delta
+    )
+
+
+def compute_window(days, limit):
+    """
+    Top ``limit`` users by points earned in the last ``days`` days, summed
+    from at most ``days`` daily buckets per user. Returns plain dicts so the
+    result can be cached as is.
+    """
+    start = timezone.localdate() - timezone.timedelta(days=days - 1)
+    rows = list(
+        DailyScore.objects.filter(day__gte=start).values('user').annotate(
+            points=Sum('points'),
+            completed=Sum('completed_challenges')
+        ).order_by('-points', '-completed', 'user')[:limit]
+    )
+    users = get_user_model().objects.only('id', 'username', 'display_name', 'avatar').in_bulk(
+        [row['user'] for row in rows]
+    )
+
+    entries = []
+    for position, row in enumerate(rows):
+        user = users[row['user']]
+        tied = position and row['points'] == entries[-1]['calculated_points']
+        entries.append({
+            'id': user.id,
+            'username': user.username,
+            'display_name': user.display_name,
+            'avatar': user.avatar.url if user.avatar else None,
+            'total_points': row['points'],
+            'calculated_points': row['points'],
+            'completed_challenges': row['completed'],
+            'rank': entries[-1]['rank'] if tied else position + 1,
+        })
+    return entries
+
+
+def _window_cache_key(days):
+    return f'leaderboard:window:{days}'
+
+
+def window_top(days):
+    """Cached top-K for a window; recomputed on a miss and by refresh_windows"""
+    entries = cache.get(_window_cache_key(days))
+    if entries is None:
+        entries = refresh_window(days)
+    return entries
+
+
+def refresh_window(days):
+    entries = compute_window(days, settings.LEADERBOARD_WINDOW_TOP_K)
+    cache.set(_window_cache_key(days), entries, settings.LEADERBOARD_WINDOW_CACHE_SECONDS)
+    return entries
+
+
+def remove_entry(points):
+    """Take a deleted entry out of the score histogram"""
+    _bump_score(points, -1)
+
+
+def top_entries(limit):
+    """The ``limit`` best entries with a ``rank`` attribute, read off leaderboard_rank_idx"""
+    entries = list(
+        LeaderboardEntry.objects.select_related('user')
+        .order_by('-points', '-completed_challenges', 'user')[:limit]
+    )
+    for position, entry in enumerate(entries):
+        tied = position and entry.points == entries[position - 1].points
+        entry.rank = entries[position - 1].rank if tied else position + 1
+    return entries
+
+
+def rank_for_points(points):
+    """1 + the number of users with a higher score; ties share a rank"""
+    higher = LeaderboardScore.objects.filter(points__gt=points).aggregate(total=Sum('users'))['total']
+    return 1 + (higher or 0)
+
+
+def neighborhood(user, k):
+    """
+    The user's rank and score with the ``k`` entries directly above and below.
+    Both sides are keyset reads starting at the user's position in
+    leaderboard_rank_idx, and ranks come from the histogram rows in between,
+    so the cost depends on ``k`` and not on the number of users. A user with
+    no entry yet is placed where a score of 0 would go.
+    """
+    entry = LeaderboardEntry.objects.filter(user=user).first()
+    points, completed = (entry.points, entry.completed_challenges) if entry else (0, 0)
+
+    above = list(
+        LeaderboardEntry.objects.select_related('user').filter(
+            Q(points__gt=points)
+            | Q(points=points, completed_challenges__gt=completed)
+            | Q(points=points, completed_challenges=completed, user__lt=user.id),
+            points__gte=points
+        ).order_by('points', 'completed_challenges', '-user')[:k]
+    )[::-1]
+    below = list(
+        LeaderboardEntry.objects.select_related('user').filter(
+            Q(points__lt=points)
+            | Q(points=points, completed_challenges__lt=completed)
+            | Q(points=points, completed_challenges=completed, user__gt=user.id),
+            points__lte=points
+        ).order_by('-points', '-completed_challenges', 'user')[:k]
+    )
+
+    # Walk the histogram down from the best score shown to the worst
+    top = above[0].points if above else points
+    bottom = below[-1].points if below else points
+    ahead = LeaderboardScore.objects.filter(points__gt=top).aggregate(total=Sum('users'))['total'] or 0
+    ranks = {}
+    for score in LeaderboardScore.objects.filter(points__gte=bottom, points__lte=top).order_by('-points'):
+        ranks[score.points] = ahead + 1
+        ahead += score.users
+    for neighbor in above + below:
+        neighbor.rank = ranks[neighbor.points]
+
+    return {
+        'rank': ranks.get(points, ahead + 1),
+        'points': points,
+        'completed_challenges': completed,
+        'above': above,
+        'below': below,
+    }
+
+
+def rebuild():
+    """Recompute every entry, the score histogram and the daily buckets from UserProgress"""
+    from challenges.models import UserProgress
+
+    totals = UserProgress.objects.filter(status='completed').order_by().values('user').annotate(
+        points=Sum('best_score'),
+        completed=Count('id')
+    )
+    with transaction.atomic():
+        # Plain DELETEs: the per-row post_delete bookkeeping is pointless here
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {LeaderboardEntry._meta.db_table}')
+            cursor.execute(f'DELETE FROM {LeaderboardScore._meta.db_table}')
+            cursor.execute(f'DELETE FROM {DailyScore._meta.db_table}')
+        LeaderboardEntry.objects.bulk_create(
+            [
+                LeaderboardEntry(user_id=row['user'], points=row['points'] or 0, completed_challenges=row['completed'])
+                for row in totals.iterator()
+            ],
+            batch_size=1000
+        )
+        LeaderboardScore.objects.bulk_create(
+            [
+                LeaderboardScore(points=row['points'], users=row['users'])
+                for row in LeaderboardEntry.objects.values('points').annotate(users=Count('user')).order_by()
+            ],
+            batch_size=1000
+        )
+        # Progress rows only remember their latest completion, so the
+        # rebuilt buckets credit each challenge to the day it was last passed
+        daily = UserProgress.objects.filter(status='completed', completed_at__isnull=False).order_by().annotate(
+            day=TruncDate('completed_at')
+        ).values('user', 'day').annotate(points=Sum('best_score'), completed=Count('id'))
+        DailyScore.objects.bulk_create(
+            [
+                DailyScore(user_id=row['user'], day=row['day'], points=row['points'] or 0, completed_challenges=row['completed'])
+                for row in daily.iterator()
+            ],
+            batch_size=1000
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from users import leaderboard
+from users.models import LeaderboardEntry
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized leaderboard from user progress'
+
+    def handle(self, *args, **options):
+        leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Leaderboard rebuilt with {LeaderboardEntry.objects.count()} users'
+        ))
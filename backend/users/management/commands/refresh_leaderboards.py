@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from users import leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Recompute the cached top users of the weekly and monthly leaderboards'
+
+    def handle(self, *args, **options):
+        for name, days in leaderboard.WINDOWS.items():
+            entries = leaderboard.refresh_window(days)
+            self.stdout.write(f'{name}: {len(entries)} users')
+        self.stdout.write(self.style.SUCCESS('Leaderboards refreshed'))
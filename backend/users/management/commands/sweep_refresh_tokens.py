@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from users.models import RefreshToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired refresh tokens in small batches; meant to run periodically'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        total = 0
+        while True:
+            # Each batch is its own short DELETE, found through refresh_token_expiry_idx
+            ids = list(RefreshToken.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = RefreshToken.objects.filter(id__in=ids).delete()
+            total += deleted
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} expired refresh tokens'))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_refreshtoken"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardScore",
+            fields=[
+                ("points", models.IntegerField(primary_key=True, serialize=False)),
+                ("users", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="leaderboard_entry",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("points", models.IntegerField(default=0)),
+                ("completed_challenges", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-points", "-completed_challenges", "user"],
+                        name="leaderboard_rank_idx",
+                    )
+                ],
+            },
+        ),
+    ]
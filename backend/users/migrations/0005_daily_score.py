@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_leaderboard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("points", models.IntegerField(default=0)),
+                ("completed_challenges", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_scores",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day", "user"], name="daily_score_window_idx")
+                ],
+                "unique_together": {("user", "day")},
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_daily_score"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="refreshtoken",
+            index=models.Index(fields=["expires_at"], name="refresh_token_expiry_idx"),
+        ),
+    ]
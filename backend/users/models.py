@@ -51,11 +51,54 @@ class RefreshToken(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            # For sweep_refresh_tokens
+            models.Index(fields=['expires_at'], name='refresh_token_expiry_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.expires_at:
-            self.expires_at = timezone.now() + timezone.timedelta(days=7)
+            self.expires_at = timezone.now() + timezone.timedelta(days=settings.REFRESH_TOKEN_EXPIRED_AFTER_DAYS)
         super().save(*args, **kwargs)
 
     @property
     def is_valid(self):
         return self.expires_at > timezone.now()
+
+class LeaderboardEntry(models.Model):
+    """
+    Materialized leaderboard row. Grading applies score deltas to it (see
+    users.leaderboard) instead of the leaderboard re-aggregating progress.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='leaderboard_entry')
+    points = models.IntegerField(default=0)
+    completed_challenges = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-points', '-completed_challenges', 'user'], name='leaderboard_rank_idx'),
+        ]
+
+class LeaderboardScore(models.Model):
+    """
+    Number of leaderboard users at each score. A user's rank is one plus the
+    users at higher scores, which sums a handful of rows no matter how many
+    users there are.
+    """
+    points = models.IntegerField(primary_key=True)
+    users = models.IntegerField(default=0)
+
+class DailyScore(models.Model):
+    """Points and completions a user earned on one day, for windowed leaderboards"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_scores')
+    day = models.DateField()
+    points = models.IntegerField(default=0)
+    completed_challenges = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['user', 'day']
+        indexes = [
+            models.Index(fields=['day', 'user'], name='daily_score_window_idx'),
+        ]
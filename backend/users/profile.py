@@ -0,0 +1,59 @@
+"""
+Challenge stats shown on a user's own profile (``/users/me/``).
+
+Everything comes from two grouped queries and is cached per user. The
+cached copy is dropped whenever one of the user's UserProgress rows is
+saved or deleted; category totals can lag by up to PROFILE_STATS_CACHE_SECONDS.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+
+def _cache_key(user_id):
+    return f'profile-stats:{user_id}'
+
+
+def compute_stats(user):
+    from challenges.models import Category, UserProgress
+
+    completed = in_progress = points = 0
+    completed_by_category = {}
+    rows = UserProgress.objects.filter(user=user).order_by().values('status', 'challenge__category').annotate(
+        count=Count('id'),
+        points=Sum('challenge__points')
+    )
+    for row in rows:
+        if row['status'] == 'completed':
+            completed += row['count']
+            points += row['points'] or 0
+            completed_by_category[row['challenge__category']] = row['count']
+        elif row['status'] == 'in_progress':
+            in_progress += row['count']
+
+    categories = Category.objects.annotate(total=Count('challenges')).values('id', 'name', 'total').order_by('id')
+    return {
+        'completed_challenges': completed,
+        'in_progress': in_progress,
+        'calculated_points': points,
+        'category_progress': [
+            {
+                'name': category['name'],
+                'completed': completed_by_category.get(category['id'], 0),
+                'total': category['total'],
+            }
+            for category in categories
+        ],
+    }
+
+
+def get_stats(user):
+    stats = cache.get(_cache_key(user.pk))
+    if stats is None:
+        stats = compute_stats(user)
+        cache.set(_cache_key(user.pk), stats, settings.PROFILE_STATS_CACHE_SECONDS)
+    return stats
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
@@ -1,11 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from challenges.models import UserProgress, UserAchievement
+from challenges.fieldsets import SparseFieldsetMixin
 from challenges.serializers import UserProgressSerializer, UserAchievementSerializer
+from .models import LeaderboardEntry
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -16,12 +18,22 @@ class UserSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['total_points', 'date_joined']
 
+    def update(self, instance, validated_data):
+        # Write only the edited columns, so a stale instance never puts back
+        # an old total_points (grading changes it with F() updates)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
 class UserDetailSerializer(UserSerializer):
-    progress = UserProgressSerializer(many=True, read_only=True, source='userprogress_set')
-    achievements = UserAchievementSerializer(many=True, read_only=True, source='userachievement_set')
+    # Only included with ?expand=progress,achievements
+    progress = UserProgressSerializer(many=True, read_only=True)
+    achievements = UserAchievementSerializer(many=True, read_only=True)
     
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ['progress', 'achievements']
+        expandable_fields = ['progress', 'achievements']
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -33,3 +45,19 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         user = User.objects.create_user(**validated_data)
         return user
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='user.id')
+    username = serializers.CharField(source='user.username')
+    display_name = serializers.CharField(source='user.display_name')
+    avatar = serializers.ImageField(source='user.avatar')
+    total_points = serializers.IntegerField(source='points')
+    calculated_points = serializers.IntegerField(source='points')
+    rank = serializers.IntegerField()
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = [
+            'id', 'username', 'display_name', 'avatar', 'total_points',
+            'calculated_points', 'completed_challenges', 'rank'
+        ]
@@ -1,24 +1,48 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from challenges.models import UserProgress, Achievement, UserAchievement
+from django.db.models import F
+from challenges.models import UserProgress
+from challenges.signals import submission_graded
 from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from . import authentication, leaderboard, profile
+from .models import LeaderboardEntry
 
 User = get_user_model()
 
+@receiver(submission_graded)
+def update_user_points(sender, progress, points_delta, **kwargs):
+    if points_delta:
+        User.objects.filter(pk=progress.user_id).update(total_points=F('total_points') + points_delta)
+        # update() sends no post_save, so drop the cached copy here
+        authentication.forget_user(progress.user_id)
+
+@receiver(submission_graded)
+def update_leaderboard(sender, progress, points_delta, newly_completed, **kwargs):
+    completed_delta = 1 if newly_completed else 0
+    leaderboard.apply_score_delta(progress.user_id, points_delta, completed_delta)
+    leaderboard.add_daily_score(progress.user_id, points_delta, completed_delta)
+
+@receiver(post_delete, sender=LeaderboardEntry)
+def remove_leaderboard_entry(sender, instance, **kwargs):
+    leaderboard.remove_entry(instance.points)
+
 @receiver(post_save, sender=UserProgress)
-def update_user_points(sender, instance, created, **kwargs):
-    if instance.status == 'completed':
-        instance.user.update_total_points()
-        
-        # Check for new achievements
-        achievements = Achievement.objects.filter(
-            points_required__lte=instance.user.total_points
-        ).exclude(
-            userachievement__user=instance.user
-        )
-        
-        for achievement in achievements:
-            UserAchievement.objects.create(
-                user=instance.user,
-                achievement=achievement
-            )
+@receiver(post_delete, sender=UserProgress)
+def invalidate_profile_stats(sender, instance, **kwargs):
+    profile.invalidate(instance.user_id)
+
+@receiver(submission_graded)
+def invalidate_graded_profile_stats(sender, progress, first_attempt, newly_completed, **kwargs):
+    # Grading writes without post_save, and the profile stats only depend on status
+    if first_attempt or newly_completed:
+        profile.invalidate(progress.user_id)
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    authentication.forget_token(instance.key)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    authentication.forget_user(instance.pk)
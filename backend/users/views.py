@@ -2,21 +2,37 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model, authenticate
-from rest_framework.authtoken.models import Token
-from .serializers import UserSerializer, UserDetailSerializer, UserRegistrationSerializer
-from django.db.models import Count, Q, Sum
-from django.utils import timezone
-from django.db import models
-from rest_framework.authentication import TokenAuthentication
-from .models import RefreshToken
+from .serializers import (
+    UserSerializer, UserDetailSerializer, UserRegistrationSerializer, LeaderboardEntrySerializer
+)
+from .authentication import CachedTokenAuthentication, issue_refresh_token, issue_token, rotate_refresh_token
+from django.db.models import Prefetch, prefetch_related_objects
+from challenges.fieldsets import wants_expanded
+from challenges.models import UserAchievement, UserProgress
+from . import leaderboard, profile
 
 User = get_user_model()
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]  # Default to authenticated for all actions
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(*self.expanded_prefetches())
+        return queryset
+
+    def expanded_prefetches(self):
+        """Prefetches for the relations requested with ?expand="""
+        prefetches = []
+        if wants_expanded(self.request, 'progress'):
+            prefetches.append(Prefetch('progress', queryset=UserProgress.objects.select_related('challenge')))
+        if wants_expanded(self.request, 'achievements'):
+            prefetches.append(Prefetch('achievements', queryset=UserAchievement.objects.select_related('achievement')))
+        return prefetches
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return UserDetailSerializer
@@ -25,8 +41,8 @@ class UserViewSet(viewsets.ModelViewSet):
         return UserSerializer
     
     def get_permissions(self):
-        # Only allow unauthenticated access to login and register
-        if self.action in ['login', 'register']:
+        # Only allow unauthenticated access to login, register and refresh
+        if self.action in ['login', 'register', 'refresh']:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
@@ -37,37 +53,17 @@ class UserViewSet(viewsets.ModelViewSet):
         
         if request.method == 'GET':
             # Get user stats
-            user_data = UserDetailSerializer(user).data
+            prefetch_related_objects([user], *self.expanded_prefetches())
+            user_data = UserDetailSerializer(user, context={'request': request}).data
             
-            # Add challenge stats
-            user_data.update({
-                'completed_challenges': user.progress.filter(status='completed').count(),
-                'in_progress': user.progress.filter(status='in_progress').count(),
-                'calculated_points': user.progress.filter(status='completed').aggregate(
-                    points=Sum('challenge__points')
-                )['points'] or 0,
-                'category_progress': []
-            })
-            
-            # Add category progress
-            from challenges.models import Category
-            categories = Category.objects.all()
-            for category in categories:
-                total_challenges = category.challenges.count()
-                completed_challenges = user.progress.filter(
-                    challenge__category=category,
-                    status='completed'
-                ).count()
-                
-                user_data['category_progress'].append({
-                    'name': category.name,
-                    'completed': completed_challenges,
-                    'total': total_challenges
-                })
+            # Challenge stats come from the per-user cache
+            user_data.update(profile.get_stats(user))
             
             return Response(user_data)
         
-        # Handle PUT/PATCH requests
+        # Handle PUT/PATCH requests. request.user may be the cached copy,
+        # so edit the current row.
+        user = User.objects.get(pk=user.pk)
         serializer = UserDetailSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -79,64 +75,18 @@ class UserViewSet(viewsets.ModelViewSet):
         if not request.user.is_authenticated:
             return Response({'error': 'Authentication required'}, 
                           status=status.HTTP_401_UNAUTHORIZED)
-        user = request.user
-        achievements = []
-        
-        # Get completed challenges count
-        completed_count = user.progress.filter(status='completed').count()
-        
-        # Basic achievements based on completed challenges
-        if completed_count >= 1:
-            achievements.append({
-                'id': 'first_challenge',
-                'name': 'First Steps',
-                'description': 'Completed your first challenge',
-                'icon': 'trophy',
-                'earned_at': user.progress.filter(status='completed').order_by('completed_at').first().completed_at
-            })
-        
-        if completed_count >= 5:
-            achievements.append({
-                'id': 'five_challenges',
-                'name': 'Getting Started',
-                'description': 'Completed 5 challenges',
-                'icon': 'star',
-                'earned_at': user.progress.filter(status='completed').order_by('completed_at')[4].completed_at
-            })
-        
-        if completed_count >= 10:
-            achievements.append({
-                'id': 'ten_challenges',
-                'name': 'Rising Star',
-                'description': 'Completed 10 challenges',
-                'icon': 'fire',
-                'earned_at': user.progress.filter(status='completed').order_by('completed_at')[9].completed_at
-            })
-        
-        # Points based achievements
-        total_points = user.progress.filter(status='completed').aggregate(
-            points=Sum('challenge__points')
-        )['points'] or 0
-        
-        if total_points >= 100:
-            achievements.append({
-                'id': 'points_100',
-                'name': 'Point Collector',
-                'description': 'Earned 100 points',
-                'icon': 'lightning',
-                'earned_at': timezone.now()
-            })
-        
-        if total_points >= 500:
-            achievements.append({
-                'id': 'points_500',
-                'name': 'Point Master',
-                'description': 'Earned 500 points',
-                'icon': 'crown',
-                'earned_at': timezone.now()
-            })
-        
-        return Response(achievements)
+        # Awarded by the achievement engine as submissions are graded
+        earned = UserAchievement.objects.filter(user=request.user).select_related('achievement').order_by('earned_at')
+        return Response([
+            {
+                'id': user_achievement.achievement_id,
+                'name': user_achievement.achievement.name,
+                'description': user_achievement.achievement.description,
+                'icon': user_achievement.achievement.icon,
+                'earned_at': user_achievement.earned_at
+            }
+            for user_achievement in earned
+        ])
     
     @action(detail=False, methods=['get'])
     def leaderboard(self, request):
@@ -144,35 +94,54 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Authentication required'}, 
                           status=status.HTTP_401_UNAUTHORIZED)
         timeframe = request.query_params.get('timeframe', 'all')
-        
-        # Base query with annotations
-        queryset = User.objects.annotate(
-            completed_challenges=models.Count(
-                'progress',
-                filter=models.Q(progress__status='completed')
-            ),
-            calculated_points=models.Sum(
-                'progress__challenge__points',
-                filter=models.Q(progress__status='completed'),
-                default=0
+
+        if timeframe == 'all':
+            # Served from the materialized leaderboard kept current by grading
+            entries = leaderboard.top_entries(10)
+            serializer = LeaderboardEntrySerializer(entries, many=True, context={'request': request})
+            return Response(serializer.data)
+
+        if timeframe == 'custom':
+            try:
+                days = int(request.query_params.get('days', ''))
+            except ValueError:
+                days = 0
+            if not 1 <= days <= leaderboard.MAX_WINDOW_DAYS:
+                return Response(
+                    {'error': f'days must be between 1 and {leaderboard.MAX_WINDOW_DAYS}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        elif timeframe in leaderboard.WINDOWS:
+            days = leaderboard.WINDOWS[timeframe]
+        else:
+            return Response({'error': 'Unknown timeframe'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Windowed boards are summed from daily score buckets and cached
+        return Response(leaderboard.window_top(days)[:10])
+
+    @action(detail=False, methods=['get'], url_path='leaderboard/me')
+    def my_rank(self, request):
+        try:
+            k = int(request.query_params.get('k', 5))
+        except ValueError:
+            k = 0
+        if not 0 <= k <= leaderboard.MAX_NEIGHBORS:
+            return Response(
+                {'error': f'k must be between 0 and {leaderboard.MAX_NEIGHBORS}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        )
-
-        # Apply timeframe filter if needed
-        if timeframe == 'week':
-            start_date = timezone.now() - timezone.timedelta(days=7)
-            queryset = queryset.filter(progress__completed_at__gte=start_date)
-        elif timeframe == 'month':
-            start_date = timezone.now() - timezone.timedelta(days=30)
-            queryset = queryset.filter(progress__completed_at__gte=start_date)
-
-        # Order by points and get top users
-        top_users = queryset.order_by('-calculated_points', '-completed_challenges')[:10]
-        
-        serializer = UserDetailSerializer(top_users, many=True)
-        return Response(serializer.data)
+
+        position = leaderboard.neighborhood(request.user, k)
+        context = {'request': request}
+        return Response({
+            'rank': position['rank'],
+            'total_points': position['points'],
+            'completed_challenges': position['completed_challenges'],
+            'above': LeaderboardEntrySerializer(position['above'], many=True, context=context).data,
+            'below': LeaderboardEntrySerializer(position['below'], many=True, context=context).data,
+        })
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], authentication_classes=[])
     def login(self, request):
         username = request.data.get('username')
         password = request.data.get('password')
@@ -192,10 +161,10 @@ class UserViewSet(viewsets.ModelViewSet):
             )
 
         # Create access token
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_token(user)
         
         # Create refresh token
-        refresh_token = RefreshToken.objects.create(user=user)
+        refresh_token = issue_refresh_token(user)
 
         return Response({
             'token': token.key,
@@ -203,39 +172,34 @@ class UserViewSet(viewsets.ModelViewSet):
             'user': UserSerializer(user).data
         })
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], authentication_classes=[])
     def refresh(self, request):
         refresh_token = request.data.get('refresh_token')
         if not refresh_token:
             return Response({'error': 'Refresh token is required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            refresh_token_obj = RefreshToken.objects.get(token=refresh_token)
-            
-            # Check if refresh token is valid
-            if not refresh_token_obj.is_valid:
-                refresh_token_obj.delete()
-                return Response({'error': 'Refresh token expired'}, 
-                              status=status.HTTP_401_UNAUTHORIZED)
+        rotated = rotate_refresh_token(refresh_token)
+        if rotated is None:
+            return Response({'error': 'Invalid or expired refresh token'},
+                          status=status.HTTP_401_UNAUTHORIZED)
+        user, new_refresh_token = rotated
 
-            # Create new access token
-            token, _ = Token.objects.get_or_create(user=refresh_token_obj.user)
+        # Create new access token
+        token = issue_token(user)
 
-            return Response({
-                'token': token.key,
-                'user': UserSerializer(refresh_token_obj.user).data
-            })
-        except RefreshToken.DoesNotExist:
-            return Response({'error': 'Invalid refresh token'}, 
-                          status=status.HTTP_401_UNAUTHORIZED)
+        return Response({
+            'token': token.key,
+            'refresh_token': str(new_refresh_token.token),
+            'user': UserSerializer(user).data
+        })
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], authentication_classes=[])
     def register(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            token, _ = Token.objects.get_or_create(user=user)
+            token = issue_token(user)
             return Response({
                 'token': token.key,
                 'user': serializer.data
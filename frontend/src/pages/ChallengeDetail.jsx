@@ -52,7 +52,7 @@ export default function ChallengeDetail() {
   const fetchDiscussions = async () => {
     try {
       const response = await axiosInstance.get(`/api/challenges/challenges/${id}/discussions/`)
-      setDiscussions(response.data)
+      setDiscussions(response.data.results)
     } catch (err) {
       console.error('Error fetching discussions:', err)
       toast.error('Failed to load discussions')
@@ -185,7 +185,7 @@ export default function ChallengeDetail() {
       
       // Refresh submissions list
       const submissionsRes = await axiosInstance.get(`/api/challenges/challenges/${id}/submissions/`)
-      setSubmissions(submissionsRes.data)
+      setSubmissions(submissionsRes.data.results)
     } catch (err) {
       console.error('Error submitting code:', err)
       if (err.response?.status === 401 || err.response?.status === 403) {
@@ -210,8 +210,8 @@ export default function ChallengeDetail() {
       ])
 
       setChallenge(challengeRes.data)
-      setSubmissions(submissionsRes.data)
-      setDiscussions(discussionsRes.data)
+      setSubmissions(submissionsRes.data.results)
+      setDiscussions(discussionsRes.data.results)
       setCode(challengeRes.data.template || '')
     } catch (err) {
       console.error('Error fetching data:', err)
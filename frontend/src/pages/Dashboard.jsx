@@ -84,7 +84,7 @@ export default function Dashboard() {
       })
 
       // Process recent challenges from progress
-      const progressData = Array.isArray(progressRes.data) ? progressRes.data : []
+      const progressData = Array.isArray(progressRes.data?.results) ? progressRes.data.results : []
       const sortedChallenges = progressData
         .filter(p => p && p.challenge && typeof p === 'object') // Ensure valid progress objects
         .sort((a, b) => {
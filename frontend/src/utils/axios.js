@@ -53,8 +53,10 @@ instance.interceptors.response.use(
             refresh_token: refresh_token
           });
 
-          const { token } = response.data;
+          // Refresh tokens are single use, so keep the one issued in exchange
+          const { token, refresh_token: nextRefreshToken } = response.data;
           localStorage.setItem('token', token);
+          localStorage.setItem('refresh_token', nextRefreshToken);
           instance.defaults.headers.common['Authorization'] = `Token ${token}`;
 
           return instance(originalRequest);